@@ -549,6 +549,38 @@ namespace EsizzleAPI.Controllers
             }
         }
 
+        /// <summary>
+        /// Internal endpoint for lambda to mark a session completed and link processed documents in one call
+        /// </summary>
+        [HttpPost("processing/{sessionId}/complete")]
+        [AllowAnonymous] // Lambda function access
+        public async Task<ActionResult> CompleteProcessing(
+            string sessionId,
+            [FromBody] CompleteProcessingRequest request)
+        {
+            try
+            {
+                var bookmarkLinks = request.Results
+                    .Where(r => r.BookmarkId.HasValue)
+                    .Select(r => (r.BookmarkId!.Value, r.ResultImageId));
+
+                var success = await _indexingRepository.CompleteProcessingSessionAsync(
+                    sessionId, request.Status, bookmarkLinks);
+
+                if (!success)
+                {
+                    return NotFound(new { message = "Processing session not found" });
+                }
+
+                return NoContent();
+            }
+            catch (Exception ex)
+            {
+                _logger.LogError(ex, "Failed to complete processing for session {SessionId}", sessionId);
+                return StatusCode(500, new { message = "Failed to complete processing" });
+            }
+        }
+
         /// <summary>
         /// Internal endpoint for lambda to link processed documents
         /// </summary>
@@ -593,6 +625,18 @@ namespace EsizzleAPI.Controllers
         public int TotalResults { get; set; }
     }
 
+    public class CompleteProcessingRequest
+    {
+        public string SessionId { get; set; } = string.Empty;
+        public int DocumentId { get; set; }
+        public string Status { get; set; } = string.Empty;
+        public int? Progress { get; set; }
+        public string? Message { get; set; }
+        public List<ProcessingResult> Results { get; set; } = new();
+        public DateTime Timestamp { get; set; }
+        public int TotalResults { get; set; }
+    }
+
     public class ProcessingResult
     {
         public int OriginalImageId { get; set; }
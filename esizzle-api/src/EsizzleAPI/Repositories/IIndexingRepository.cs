@@ -74,6 +74,11 @@ namespace EsizzleAPI.Repositories
         /// </summary>
         Task<bool> UpdateProcessingSessionAsync(string sessionId, string status, string? errorMessage = null);
         
+        /// <summary>
+        /// Complete processing session and link bookmarks to result documents in a single transaction
+        /// </summary>
+        Task<bool> CompleteProcessingSessionAsync(string sessionId, string status, IEnumerable<(int BookmarkId, int ResultImageId)> bookmarkLinks);
+        
         /// <summary>
         /// Check if processing session exists
         /// </summary>
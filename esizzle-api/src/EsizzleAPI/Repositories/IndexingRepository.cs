@@ -482,6 +482,95 @@ namespace EsizzleAPI.Repositories
             return false;
         }
 
+        public async Task<bool> CompleteProcessingSessionAsync(string sessionId, string status, IEnumerable<(int BookmarkId, int ResultImageId)> bookmarkLinks)
+        {
+            const int maxRetries = 3;
+            const int baseDelayMs = 500;
+
+            var links = bookmarkLinks
+                .Select(link => new { link.BookmarkId, link.ResultImageId })
+                .ToList();
+
+            for (int attempt = 0; attempt <= maxRetries; attempt++)
+            {
+                try
+                {
+                    using var connection = _dbConnectionFactory.CreateConnection();
+                    connection.Open();
+                    using var transaction = connection.BeginTransaction();
+
+                    const string sessionSql = @"
+                        UPDATE ProcessingSessions 
+                        SET Status = @status, 
+                            ErrorMessage = NULL,
+                            CompletedDate = @completedDate
+                        WHERE SessionId = @sessionId";
+
+                    var rowsAffected = await connection.ExecuteAsync(sessionSql, new
+                    {
+                        status,
+                        completedDate = DateTime.UtcNow,
+                        sessionId
+                    }, transaction);
+
+                    if (rowsAffected > 0)
+                    {
+                        const string linkSql = @"
+                            UPDATE ImageBookmark 
+                            SET ResultImageID = @ResultImageId
+                            WHERE ID = @BookmarkId";
+
+                        if (links.Count > 0)
+                        {
+                            await connection.ExecuteAsync(linkSql, links, transaction);
+                        }
+
+                        transaction.Commit();
+
+                        if (attempt > 0)
+                        {
+                            Console.WriteLine($"[CompleteProcessingSessionAsync] Successfully completed session {sessionId} after {attempt + 1} attempts");
+                        }
+                        return true;
+                    }
+
+                    transaction.Rollback();
+
+                    // Session not found - it may not be committed yet, so retry
+                    // as UpdateProcessingSessionAsync does
+                    var exists = await SessionExistsAsync(sessionId);
+                    if (!exists && attempt < maxRetries)
+                    {
+                        Console.WriteLine($"[CompleteProcessingSessionAsync] Session {sessionId} not found (attempt {attempt + 1}), retrying...");
+
+                        // Exponential backoff
+                        var delay = baseDelayMs * (int)Math.Pow(2, attempt);
+                        await Task.Delay(delay);
+                        continue;
+                    }
+
+                    Console.WriteLine($"[CompleteProcessingSessionAsync] Session {sessionId} not found after {attempt + 1} attempts");
+                    return false;
+                }
+                catch (Exception ex)
+                {
+                    if (attempt == maxRetries)
+                    {
+                        Console.WriteLine($"[CompleteProcessingSessionAsync] Failed to complete session {sessionId} after {maxRetries + 1} attempts: {ex.Message}");
+                        throw;
+                    }
+
+                    Console.WriteLine($"[CompleteProcessingSessionAsync] Error completing session {sessionId} (attempt {attempt + 1}): {ex.Message}, retrying...");
+
+                    // Exponential backoff
+                    var delay = baseDelayMs * (int)Math.Pow(2, attempt);
+                    await Task.Delay(delay);
+                }
+            }
+
+            return false;
+        }
+
         public async Task<bool> SessionExistsAsync(string sessionId)
         {
             using var connection = _dbConnectionFactory.CreateConnection();
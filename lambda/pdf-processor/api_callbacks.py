@@ -9,22 +9,47 @@ Date: January 2025
 """
 
 import requests
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 import os
-import json
+import random
+import atexit
+import threading
+from functools import lru_cache
 from typing import Dict, List, Any, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
+# Shared HTTP session, kept at module scope so pooled keep-alive connections
+# survive across callbacks and across warm Lambda invocations
+_SESSION: Optional[requests.Session] = None
+
 class APICallbackError(Exception):
     """Custom exception for API callback failures"""
     pass
 
+class _JitteredRetry(Retry):
+    """Retry policy that adds random jitter on top of exponential backoff"""
+    
+    BACKOFF_JITTER = 0.3
+    
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        if backoff <= 0:
+            return backoff
+        return backoff + random.uniform(0, self.BACKOFF_JITTER)
+
+@lru_cache(maxsize=1)
 def get_api_config() -> Dict[str, str]:
     """
     Get API configuration from environment variables
     
+    The result is cached for the lifetime of the process since the
+    environment does not change between invocations.
+    
     Returns:
         dict: API configuration parameters
         
@@ -44,10 +69,14 @@ def get_api_config() -> Dict[str, str]:
         'retry_attempts': int(os.environ.get('API_RETRY_ATTEMPTS', '3'))
     }
 
+@lru_cache(maxsize=1)
 def get_auth_headers() -> Dict[str, str]:
     """
     Get authentication headers for API requests
     
+    The result is cached for the lifetime of the process; callers must not
+    mutate the returned dict.
+    
     Returns:
         dict: HTTP headers for authentication
     """
@@ -64,19 +93,91 @@ def get_auth_headers() -> Dict[str, str]:
     
     return headers
 
-def make_api_request(method: str, endpoint: str, data: Optional[Dict] = None, 
-                    retry_count: int = 0) -> Dict[str, Any]:
+def _get_session() -> requests.Session:
+    """
+    Get the shared HTTP session, creating it on first use
+    
+    Returns:
+        requests.Session: Session with pooled connections and auth headers applied
+    """
+    global _SESSION
+    
+    if _SESSION is None:
+        session = requests.Session()
+        
+        # Retry transient failures on the pooled connection instead of
+        # re-entering make_api_request
+        retry_attempts = get_api_config()['retry_attempts']
+        retry = _JitteredRetry(
+            total=retry_attempts,
+            connect=retry_attempts,
+            read=retry_attempts,
+            backoff_factor=0.3,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'PUT', 'POST', 'DELETE']),
+            raise_on_status=False
+        )
+        
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        
+        # Auth headers don't change within a process, so set them once
+        session.headers.update(get_auth_headers())
+        
+        _SESSION = session
+    
+    return _SESSION
+
+@atexit.register
+def close_session() -> None:
+    """Close the shared HTTP session when the container shuts down"""
+    global _SESSION
+    
+    if _SESSION is not None:
+        _SESSION.close()
+        _SESSION = None
+
+def warm_api_session() -> bool:
     """
-    Make API request with retry logic and error handling
+    Create the shared HTTP session ahead of use
+    
+    Intended for the Lambda init phase. It makes no request: a health check
+    here would block behind API_TIMEOUT and the adapter's retries, and the
+    init phase is capped at 10 seconds. Failures are logged and otherwise
+    ignored.
+    
+    Returns:
+        bool: True if the session was created
+    """
+    try:
+        _get_session()
+        return True
+    except Exception as e:
+        logger.warning(f"API session warmup failed: {e}")
+        return False
+
+def _dumps(data: Any) -> bytes:
+    """Serialize a request payload, emitting datetimes as ISO 8601 with a 'Z' suffix"""
+    return orjson.dumps(data, option=orjson.OPT_UTC_Z)
+
+def make_api_request(method: str, endpoint: str, data: Optional[Dict] = None,
+                     parse_response: bool = True) -> Dict[str, Any]:
+    """
+    Make API request with error handling
+    
+    Transient failures (timeouts, connection errors, 5xx responses) are retried
+    by the session adapter with jittered exponential backoff.
     
     Args:
         method: HTTP method (GET, POST, PUT, etc.)
         endpoint: API endpoint (without base URL)
         data: Request payload data
-        retry_count: Current retry attempt
+        parse_response: Set to False when the caller ignores the response body;
+            the body is then streamed and discarded instead of parsed
         
     Returns:
-        dict: API response data
+        dict: API response data, or an empty dict when parse_response is False
         
     Raises:
         APICallbackError: If request fails after retries
@@ -84,55 +185,98 @@ def make_api_request(method: str, endpoint: str, data: Optional[Dict] = None,
     try:
         config = get_api_config()
         url = f"{config['base_url']}{endpoint}"
-        headers = get_auth_headers()
         
         logger.info(f"Making API {method} request to {url}")
         
-        # Make the request
-        response = requests.request(
+        # Make the request over the shared keep-alive session
+        response = _get_session().request(
             method=method,
             url=url,
-            json=data,
-            headers=headers,
-            timeout=config['timeout']
+            data=_dumps(data) if data is not None else None,
+            timeout=config['timeout'],
+            stream=not parse_response
         )
         
         # Handle response
         if response.status_code in [200, 201, 204]:
+            if not parse_response:
+                # Drain rather than just close so the keep-alive connection
+                # goes back to the pool
+                response.raw.drain_conn()
+                response.close()
+                return {}
             try:
-                return response.json() if response.content else {}
-            except json.JSONDecodeError:
+                return orjson.loads(response.content) if response.content else {}
+            except orjson.JSONDecodeError:
                 return {}
         else:
             error_msg = f"API request failed with status {response.status_code}: {response.text}"
             logger.error(error_msg)
-            
-            # Retry on certain status codes
-            if response.status_code in [500, 502, 503, 504] and retry_count < config['retry_attempts']:
-                logger.info(f"Retrying API request (attempt {retry_count + 1})")
-                return make_api_request(method, endpoint, data, retry_count + 1)
-            
             raise APICallbackError(error_msg)
             
     except requests.exceptions.Timeout:
         error_msg = f"API request timeout for {endpoint}"
         logger.error(error_msg)
-        
-        if retry_count < config['retry_attempts']:
-            logger.info(f"Retrying API request after timeout (attempt {retry_count + 1})")
-            return make_api_request(method, endpoint, data, retry_count + 1)
-        
         raise APICallbackError(error_msg)
         
     except requests.exceptions.RequestException as e:
         error_msg = f"API request failed for {endpoint}: {e}"
         logger.error(error_msg)
+        raise APICallbackError(error_msg)
+
+def _utc_timestamp() -> datetime:
+    """Current UTC time; serialized by _dumps() as ISO 8601 with a 'Z' suffix"""
+    return datetime.now(timezone.utc)
+
+def _build_status_payload(status: str, progress: Optional[int] = None,
+                          message: Optional[str] = None, error: Optional[str] = None,
+                          timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+    """Build the request body for a processing status update"""
+    payload = {
+        'status': status,
+        'timestamp': timestamp or _utc_timestamp()
+    }
+    
+    if progress is not None:
+        payload['progress'] = progress
         
-        if retry_count < config['retry_attempts']:
-            logger.info(f"Retrying API request after error (attempt {retry_count + 1})")
-            return make_api_request(method, endpoint, data, retry_count + 1)
+    if message:
+        payload['message'] = message
         
-        raise APICallbackError(error_msg)
+    if error:
+        payload['error'] = error
+    
+    return payload
+
+def _build_link_payload(results: List[Dict[str, Any]],
+                        timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+    """Build the request body for linking processing results"""
+    # Transform results to match API expected format
+    api_results = []
+    for result in results:
+        api_result = {
+            'originalImageId': result['originalImageId'],
+            'resultImageId': result['resultImageId'],
+            'startPage': result['startPage'],
+            'endPage': result['endPage'],
+            'pageCount': result['pageCount'],
+            'documentTypeId': result['documentTypeId'] if result['documentTypeId'] is not None else 0,
+            'documentTypeName': result['documentTypeName'] or '',
+            'filename': result['filename'],
+            'processingStatus': result['processingStatus']
+        }
+        
+        # Include optional fields if present
+        if 'bookmarkId' in result and result['bookmarkId'] is not None:
+            api_result['bookmarkId'] = result['bookmarkId']
+            
+        api_results.append(api_result)
+    
+    return {
+        'results': api_results,
+        'timestamp': timestamp or _utc_timestamp(),
+        'totalResults': len(api_results)
+    }
 
 def update_processing_status(session_id: str, status: str, progress: Optional[int] = None,
                            message: Optional[str] = None, error: Optional[str] = None) -> bool:
@@ -155,24 +299,11 @@ def update_processing_status(session_id: str, status: str, progress: Optional[in
     for attempt in range(max_retries + 1):
         try:
             endpoint = f"/api/documents/processing/{session_id}/status"
-            
-            payload = {
-                'status': status,
-                'timestamp': datetime.utcnow().isoformat() + 'Z'
-            }
-            
-            if progress is not None:
-                payload['progress'] = progress
-                
-            if message:
-                payload['message'] = message
-                
-            if error:
-                payload['error'] = error
+            payload = _build_status_payload(status, progress, message, error)
             
             logger.info(f"Updating processing status for session {session_id}: {status} (attempt {attempt + 1})")
             
-            response = make_api_request('PUT', endpoint, payload)
+            make_api_request('PUT', endpoint, payload, parse_response=False)
             
             logger.info(f"Successfully updated processing status for session {session_id}")
             return True
@@ -206,6 +337,58 @@ def update_processing_status(session_id: str, status: str, progress: Optional[in
     
     return False
 
+class StatusBatcher:
+    """
+    Coalesces intermediate 'processing' status updates off the critical path
+    
+    update() only records the latest progress; a background timer sends it
+    at most once per interval, dropping updates superseded in between.
+    Call flush() before any blocking 'completed' or 'error' update so the
+    last progress value cannot arrive after it.
+    """
+    
+    def __init__(self, session_id: str, interval: float = 0.5):
+        self.session_id = session_id
+        self.interval = interval
+        self._lock = threading.Lock()       # guards _pending and _timer
+        self._send_lock = threading.Lock()  # keeps sends in order
+        self._pending: Optional[tuple] = None
+        self._timer: Optional[threading.Timer] = None
+    
+    def update(self, progress: int, message: Optional[str] = None) -> None:
+        """
+        Queue a 'processing' status update without blocking
+        
+        Args:
+            progress: Progress percentage (0-100)
+            message: Optional status message
+        """
+        with self._lock:
+            self._pending = (progress, message)
+            if self._timer is None:
+                self._timer = threading.Timer(self.interval, self._send_pending)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def flush(self) -> None:
+        """Send any queued update now and wait for in-flight sends to finish"""
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        self._send_pending()
+    
+    def _send_pending(self) -> None:
+        with self._send_lock:
+            with self._lock:
+                pending, self._pending = self._pending, None
+                self._timer = None
+            
+            if pending is not None:
+                progress, message = pending
+                update_processing_status(self.session_id, 'processing',
+                                         progress=progress, message=message)
+
 def verify_session_exists(session_id: str) -> bool:
     """
     Verify that a processing session exists before attempting operations
@@ -221,7 +404,7 @@ def verify_session_exists(session_id: str) -> bool:
         
         logger.info(f"Verifying session exists: {session_id}")
         
-        response = make_api_request('GET', endpoint)
+        make_api_request('GET', endpoint, parse_response=False)
         
         logger.info(f"Session {session_id} exists and is accessible")
         return True
@@ -250,37 +433,11 @@ def link_processing_results(document_id: int, results: List[Dict[str, Any]]) ->
     """
     try:
         endpoint = f"/api/documents/{document_id}/link-results"
+        payload = _build_link_payload(results)
         
-        # Transform results to match API expected format
-        api_results = []
-        for result in results:
-            api_result = {
-                'originalImageId': result['originalImageId'],
-                'resultImageId': result['resultImageId'],
-                'startPage': result['startPage'],
-                'endPage': result['endPage'],
-                'pageCount': result['pageCount'],
-                'documentTypeId': result['documentTypeId'] if result['documentTypeId'] is not None else 0,
-                'documentTypeName': result['documentTypeName'] or '',
-                'filename': result['filename'],
-                'processingStatus': result['processingStatus']
-            }
-            
-            # Include optional fields if present
-            if 'bookmarkId' in result and result['bookmarkId'] is not None:
-                api_result['bookmarkId'] = result['bookmarkId']
-                
-            api_results.append(api_result)
-        
-        payload = {
-            'results': api_results,
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'totalResults': len(api_results)
-        }
+        logger.info(f"Linking {payload['totalResults']} processing results for document {document_id}")
         
-        logger.info(f"Linking {len(api_results)} processing results for document {document_id}")
-        
-        response = make_api_request('POST', endpoint, payload)
+        make_api_request('POST', endpoint, payload, parse_response=False)
         
         logger.info(f"Successfully linked processing results for document {document_id}")
         return True
@@ -289,12 +446,31 @@ def link_processing_results(document_id: int, results: List[Dict[str, Any]]) ->
         logger.error(f"Failed to link processing results for document {document_id}: {e}")
         return False
 
+def _build_completion_payload(session_id: str, document_id: int,
+                              results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the request body for the aggregate processing completion call"""
+    timestamp = _utc_timestamp()
+    payload = _build_link_payload(results, timestamp)
+    payload.update(_build_status_payload(
+        status='completed',
+        progress=100,
+        message=f'Successfully processed {len(results)} documents',
+        timestamp=timestamp
+    ))
+    payload['sessionId'] = session_id
+    payload['documentId'] = document_id
+    return payload
+
 def notify_processing_completion(session_id: str, document_id: int, 
                                results: List[Dict[str, Any]], success: bool = True,
                                error_message: Optional[str] = None) -> bool:
     """
     Send comprehensive processing completion notification
     
+    On success the 'completed' status and the result links are sent in a
+    single request, which the API applies in one transaction. If the API
+    can't find the session, the links and status are sent separately.
+    
     Args:
         session_id: Processing session ID
         document_id: Original document ID
@@ -307,18 +483,31 @@ def notify_processing_completion(session_id: str, document_id: int,
     """
     try:
         if success:
-            # Update status to completed
-            status_updated = update_processing_status(
-                session_id=session_id,
-                status='completed',
-                progress=100,
-                message=f'Successfully processed {len(results)} documents'
-            )
+            endpoint = f"/api/documents/processing/{session_id}/complete"
+            payload = _build_completion_payload(session_id, document_id, results)
             
-            # Link results
-            results_linked = link_processing_results(document_id, results)
+            logger.info(f"Completing processing session {session_id} with {payload['totalResults']} results")
             
-            return status_updated and results_linked
+            try:
+                make_api_request('POST', endpoint, payload, parse_response=False)
+            except APICallbackError as e:
+                if "404" not in str(e):
+                    raise
+                
+                # The API rolls the whole call back when the session row is
+                # missing, so link the results on their own to keep them
+                logger.warning(f"Session {session_id} not found on completion, linking results separately")
+                results_linked = link_processing_results(document_id, results)
+                status_updated = update_processing_status(
+                    session_id=session_id,
+                    status='completed',
+                    progress=100,
+                    message=payload['message']
+                )
+                return results_linked and status_updated
+            
+            logger.info(f"Successfully completed processing session {session_id}")
+            return True
         else:
             # Update status to error
             return update_processing_status(
@@ -8,24 +8,61 @@ Author: Esizzle Development Team
 Date: January 2025
 """
 
-import pymysql
 import logging
 import os
 import json
+import atexit
+import threading
+from functools import lru_cache
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timezone
 from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
 
+# Prefer the C-accelerated mysqlclient driver and fall back to pure-Python
+# PyMySQL when it is not installed. Both expose the same DB-API surface.
+try:
+    import MySQLdb as db_driver
+    import MySQLdb.connections
+    import MySQLdb.cursors
+    _DRIVER_CONNECT_KWARGS: Dict[str, Any] = {}
+except ImportError:
+    import pymysql as db_driver
+    import pymysql.connections
+    import pymysql.cursors
+    _DRIVER_CONNECT_KWARGS = {
+        'auth_plugin_map': {'mysql_native_password': ''},
+        'server_public_key': None
+    }
+
+# Connection kept at module scope so it is reused across helper calls and
+# across warm Lambda invocations. A single connection is enough since the
+# handler is single-threaded.
+_POOL: Optional[db_driver.connections.Connection] = None
+_POOL_LOCK = threading.Lock()
+
+# Connect timeout (seconds) for the init-phase warmup, which must finish well
+# inside Lambda's 10 second init limit
+WARMUP_CONNECT_TIMEOUT = 2
+
+# Bookmark lookups are split into IN-lists of at most this many IDs; the
+# statement text for each list size is built once and reused
+BOOKMARK_LOOKUP_CHUNK_SIZE = 500
+_BOOKMARK_INFO_SQL: Dict[int, str] = {}
+
 class DatabaseError(Exception):
     """Custom exception for database operations"""
     pass
 
+@lru_cache(maxsize=1)
 def get_db_connection_params() -> Dict[str, str]:
     """
     Get database connection parameters from environment variables
     
+    The result is cached for the lifetime of the process since the
+    environment does not change between invocations.
+    
     Returns:
         dict: Database connection parameters
         
@@ -47,51 +84,215 @@ def get_db_connection_params() -> Dict[str, str]:
     
     return params
 
+def _connect(connect_timeout: Optional[int] = None) -> db_driver.connections.Connection:
+    """
+    Open a new database connection
+    
+    Args:
+        connect_timeout: Seconds to wait for the server; the driver's default
+            when None
+    
+    Returns:
+        Connection: Database connection
+    """
+    params = get_db_connection_params()
+    kwargs = dict(_DRIVER_CONNECT_KWARGS)
+    if connect_timeout is not None:
+        kwargs['connect_timeout'] = connect_timeout
+    
+    return db_driver.connect(
+        host=params['host'],
+        user=params['user'],
+        password=params['password'],
+        database=params['name'],
+        port=params['port'],
+        charset=params['charset'],
+        autocommit=False,
+        cursorclass=db_driver.cursors.DictCursor,
+        sql_mode='',
+        **kwargs
+    )
+
+def _get_pooled_connection() -> db_driver.connections.Connection:
+    """
+    Get the shared database connection, opening or reviving it as needed
+    
+    Returns:
+        Connection: Live database connection
+    """
+    global _POOL
+    
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = _connect()
+            logger.info("Database connection established")
+        else:
+            # Reconnect if the server closed the idle socket
+            try:
+                _POOL.ping()
+            except db_driver.Error:
+                _POOL = _connect()
+                logger.info("Database connection re-established")
+        
+        return _POOL
+
+def _discard_pooled_connection() -> None:
+    """Close and forget the shared connection so the next caller reconnects"""
+    global _POOL
+    
+    with _POOL_LOCK:
+        if _POOL is not None:
+            try:
+                _POOL.close()
+            except Exception:
+                pass
+            _POOL = None
+            logger.debug("Database connection discarded")
+
+def warm_db_connection() -> bool:
+    """
+    Open the shared database connection ahead of use
+    
+    Intended for the Lambda init phase so the first invocation does not pay
+    the connection handshake. The connect timeout is kept short so an
+    unreachable database can't stall init; failures are logged and otherwise
+    ignored, and the first invocation connects normally.
+    
+    Returns:
+        bool: True if the connection is open
+    """
+    global _POOL
+    
+    try:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = _connect(connect_timeout=WARMUP_CONNECT_TIMEOUT)
+                logger.info("Database connection established")
+        return True
+    except Exception as e:
+        logger.warning(f"Database connection warmup failed: {e}")
+        return False
+
+@atexit.register
+def close_db_connection() -> None:
+    """Close the shared connection when the container shuts down"""
+    _discard_pooled_connection()
+
 @contextmanager
 def get_db_connection():
     """
-    Context manager for database connections with proper cleanup
+    Context manager for the shared database connection
+    
+    The connection stays open after the block exits. Any transaction left
+    open by the caller is rolled back so the next caller starts clean.
     
     Yields:
-        pymysql.Connection: Database connection
+        Connection: Database connection
         
     Raises:
         DatabaseError: If connection fails
     """
     connection = None
     try:
-        params = get_db_connection_params()
-        connection = pymysql.connect(
-            host=params['host'],
-            user=params['user'],
-            password=params['password'],
-            database=params['name'],
-            port=params['port'],
-            charset=params['charset'],
-            autocommit=False,
-            cursorclass=pymysql.cursors.DictCursor,
-            auth_plugin_map={'mysql_native_password': ''},
-            server_public_key=None,
-            sql_mode=''
-        )
-        
-        logger.info("Database connection established")
+        connection = _get_pooled_connection()
         yield connection
+        connection.rollback()
         
-    except pymysql.Error as e:
+    except (db_driver.OperationalError, db_driver.InterfaceError) as e:
+        # Broken socket - drop the connection so the next call reconnects
+        logger.error(f"Database connection failed: {e}")
+        _discard_pooled_connection()
+        raise DatabaseError(f"Failed to connect to database: {e}")
+    except db_driver.Error as e:
         logger.error(f"Database connection failed: {e}")
+        _rollback_quietly(connection)
         raise DatabaseError(f"Failed to connect to database: {e}")
     except Exception as e:
         logger.error(f"Unexpected database error: {e}")
+        _rollback_quietly(connection)
         raise DatabaseError(f"Database error: {e}")
-    finally:
-        if connection:
-            connection.close()
-            logger.debug("Database connection closed")
+
+def _rollback_quietly(connection: Optional[db_driver.connections.Connection]) -> None:
+    """Roll back the current transaction, discarding the connection if that fails"""
+    if connection is None:
+        return
+    try:
+        connection.rollback()
+    except Exception:
+        _discard_pooled_connection()
+
+@contextmanager
+def db_transaction(conn=None):
+    """
+    Context manager for a unit of work that commits once on success
+    
+    When an open connection is passed in, the caller owns the transaction:
+    the connection is yielded as-is and nothing is committed here. This lets
+    several helpers share one transaction and one COMMIT.
+    
+    Args:
+        conn: Optional connection from an enclosing db_transaction()
+        
+    Yields:
+        Connection: Database connection
+    """
+    if conn is not None:
+        yield conn
+        return
+    
+    with get_db_connection() as own_conn:
+        yield own_conn
+        own_conn.commit()
+
+def _split_image_values(loan_id: Optional[int], original_name: Optional[str],
+                        split_range: Dict[str, Any], page_count: int,
+                        now: datetime) -> Tuple[Any, ...]:
+    """
+    Build the Image column values for a split document
+    
+    Args:
+        loan_id: LoanID copied from the source document
+        original_name: OriginalName copied from the source document
+        split_range: Split range information with document type details
+        page_count: Number of pages in split document
+        now: Timestamp for DateCreated and DateUpdated
+        
+    Returns:
+        tuple: Values in (LoanID, OriginalName, DocTypeManualID, DocumentDate,
+        Comments, PageCount, Path, ImageStatusTypeID, DateCreated,
+        DateUpdated, Deleted) order
+    """
+    # Parse document date if provided
+    document_date = None
+    if split_range.get('documentDate'):
+        try:
+            document_date = datetime.fromisoformat(split_range['documentDate'].replace('Z', '+00:00'))
+        except:
+            document_date = None
+    
+    # Determine status based on document type (generic vs normal)
+    # Status 1 (Production) = Named documents ready for production
+    # Status 20 (NeedsWork) = Generic documents requiring additional work
+    document_type_id = split_range.get('documentTypeId')
+    status_id = 20 if document_type_id == -1 else 1  # 20 = NeedsWork, 1 = Production
+    
+    return (
+        loan_id,                                    # LoanID
+        original_name,                              # OriginalName
+        document_type_id,                           # DocTypeManualID
+        document_date,                              # DocumentDate
+        split_range.get('comments'),                # Comments
+        page_count,                                 # PageCount
+        "\\",                                       # Path (default backslash like existing records)
+        status_id,                                  # ImageStatusTypeID (20 for generic, 1 for named)
+        now,                                        # DateCreated
+        now,                                        # DateUpdated
+        False                                       # Deleted
+    )
 
 def create_image_record(source_document_id: int, split_range: Dict[str, Any], 
                        s3_key: Optional[str], filename: Optional[str], page_count: int, 
-                       metadata: Dict[str, Any]) -> int:
+                       metadata: Dict[str, Any], conn=None) -> int:
     """
     Create new Image record for split document
     
@@ -102,6 +303,7 @@ def create_image_record(source_document_id: int, split_range: Dict[str, Any],
         filename: Generated filename for split document
         page_count: Number of pages in split document
         metadata: Additional metadata (userId, loanId, etc.)
+        conn: Optional connection from an enclosing db_transaction()
         
     Returns:
         int: New Image record ID
@@ -110,24 +312,11 @@ def create_image_record(source_document_id: int, split_range: Dict[str, Any],
         DatabaseError: If database operation fails
     """
     try:
-        with get_db_connection() as conn:
+        with db_transaction(conn) as conn:
             cursor = conn.cursor()
             
-            # First, get loan ID and original name from source document
-            cursor.execute("""
-                SELECT LoanID, OriginalName 
-                FROM Image 
-                WHERE ID = %s
-            """, (source_document_id,))
-            
-            source_info = cursor.fetchone()
-            if not source_info:
-                raise DatabaseError(f"Source document {source_document_id} not found")
-            
-            loan_id = source_info['LoanID']
-            original_name = source_info['OriginalName']
-            
-            # Create new Image record with proper status
+            # Create new Image record with proper status, copying LoanID and
+            # OriginalName from the source document in the same statement
             insert_sql = """
                 INSERT INTO Image (
                     LoanID,
@@ -141,44 +330,27 @@ def create_image_record(source_document_id: int, split_range: Dict[str, Any],
                     DateCreated,
                     DateUpdated,
                     Deleted
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
                 )
+                SELECT
+                    LoanID, %s, %s, %s, OriginalName, %s, %s, %s, %s, %s, %s
+                FROM Image
+                WHERE ID = %s
             """
             
-            # Parse document date if provided
-            document_date = None
-            if split_range.get('documentDate'):
-                try:
-                    document_date = datetime.fromisoformat(split_range['documentDate'].replace('Z', '+00:00'))
-                except:
-                    document_date = None
-            
-            # Determine status based on document type (generic vs normal)
-            # Status 1 (Production) = Named documents ready for production
-            # Status 20 (NeedsWork) = Generic documents requiring additional work
-            document_type_id = split_range.get('documentTypeId')
-            status_id = 20 if document_type_id == -1 else 1  # 20 = NeedsWork, 1 = Production
-            
-            # Prepare values
-            values = (
-                loan_id,                                    # LoanID
-                split_range.get('documentTypeId'),          # DocTypeManualID
-                document_date,                              # DocumentDate
-                split_range.get('comments'),                # Comments
-                original_name,                              # OriginalName (from source document)  
-                page_count,                                 # PageCount
-                "\\",                                       # Path (default backslash like existing records)
-                status_id,                                  # ImageStatusTypeID (20 for generic, 1 for named)
-                datetime.now(timezone.utc),                 # DateCreated
-                datetime.now(timezone.utc),                 # DateUpdated
-                False                                       # Deleted
+            # Same timestamp for creation and update of the new row
+            now = datetime.now(timezone.utc)
+            
+            # Prepare values (in SELECT order); LoanID and OriginalName come
+            # from the source row, so drop them from the shared value tuple
+            values = _split_image_values(None, None, split_range, page_count, now)[2:] + (
+                source_document_id,                         # Source document for LoanID/OriginalName
             )
             
             cursor.execute(insert_sql, values)
-            new_image_id = cursor.lastrowid
+            if cursor.rowcount == 0:
+                raise DatabaseError(f"Source document {source_document_id} not found")
             
-            conn.commit()
+            new_image_id = cursor.lastrowid
             
             logger.info(f"Created new Image record {new_image_id} for split document")
             return new_image_id
@@ -187,135 +359,237 @@ def create_image_record(source_document_id: int, split_range: Dict[str, Any],
         logger.error(f"Failed to create Image record: {e}")
         raise DatabaseError(f"Failed to create Image record: {e}")
 
-def update_image_record_s3_info(image_id: int, s3_key: str, filename: str) -> None:
+def create_image_records_bulk(source_document_id: int, split_ranges: List[Dict[str, Any]],
+                              metadata: Dict[str, Any], conn=None) -> List[int]:
     """
-    Update Image record with S3 information after upload
+    Create Image records for all split ranges with one multi-row INSERT
+    
+    lastrowid only gives the first new ID. The rest are read back by
+    _inserted_split_ids(), because with interleaved auto-increment locking
+    (innodb_autoinc_lock_mode=2, the MySQL 8 default) one statement's IDs
+    are not guaranteed to be consecutive. Falls back to one
+    create_image_record() call per range if the bulk statement is rejected
+    by the driver.
     
     Args:
-        image_id: Image record ID to update
-        s3_key: S3 key where PDF is stored
-        filename: Final filename
+        source_document_id: Original document ID
+        split_ranges: Split ranges with start/end pages and document type details
+        metadata: Additional metadata (userId, loanId, etc.)
+        conn: Optional connection from an enclosing db_transaction()
+        
+    Returns:
+        list: New Image record IDs, in split_ranges order
         
     Raises:
         DatabaseError: If database operation fails
     """
+    if not split_ranges:
+        return []
+    
     try:
-        with get_db_connection() as conn:
+        with db_transaction(conn) as conn:
             cursor = conn.cursor()
             
-            # Update Image record with S3 details
-            update_sql = """
-                UPDATE Image 
-                SET Path = %s, OriginalName = %s, DateUpdated = %s
+            cursor.execute("""
+                SELECT LoanID, OriginalName
+                FROM Image
                 WHERE ID = %s
-            """
+            """, (source_document_id,))
             
-            values = (
-                s3_key,                          # Path (S3 key)
-                filename,                        # OriginalName
-                datetime.now(timezone.utc),      # DateUpdated
-                image_id                         # ID
-            )
+            source = cursor.fetchone()
+            if not source:
+                raise DatabaseError(f"Source document {source_document_id} not found")
             
-            cursor.execute(update_sql, values)
+            now = datetime.now(timezone.utc)
             
-            if cursor.rowcount == 0:
-                raise DatabaseError(f"No Image record found with ID {image_id}")
+            row_placeholder = '(' + ','.join(['%s'] * 11) + ')'
+            params: List[Any] = []
+            for split_range in split_ranges:
+                params.extend(_split_image_values(
+                    source['LoanID'], source['OriginalName'], split_range,
+                    split_range['endPage'] - split_range['startPage'] + 1, now
+                ))
+            
+            try:
+                cursor.execute(f"""
+                    INSERT INTO Image (
+                        LoanID,
+                        OriginalName,
+                        DocTypeManualID,
+                        DocumentDate,
+                        Comments,
+                        PageCount,
+                        Path,
+                        ImageStatusTypeID,
+                        DateCreated,
+                        DateUpdated,
+                        Deleted
+                    )
+                    VALUES {','.join([row_placeholder] * len(split_ranges))}
+                """, params)
+            except db_driver.Error as e:
+                logger.warning(f"Bulk Image insert failed, falling back to per-row inserts: {e}")
+                return [
+                    create_image_record(
+                        source_document_id=source_document_id,
+                        split_range=split_range,
+                        s3_key=None,
+                        filename=None,
+                        page_count=split_range['endPage'] - split_range['startPage'] + 1,
+                        metadata=metadata,
+                        conn=conn
+                    )
+                    for split_range in split_ranges
+                ]
+            
+            if cursor.rowcount != len(split_ranges):
+                raise DatabaseError(
+                    f"Expected {len(split_ranges)} Image rows, inserted {cursor.rowcount}"
+                )
             
-            conn.commit()
+            # lastrowid is the ID of the first row of a multi-row insert
+            new_image_ids = _inserted_split_ids(cursor, cursor.lastrowid, len(split_ranges), source)
             
-            logger.info(f"Updated Image record {image_id} with S3 info: {s3_key}")
+            logger.info(f"Created {len(new_image_ids)} Image records for split documents: {new_image_ids}")
+            return new_image_ids
             
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"Failed to update Image record {image_id}: {e}")
-        raise DatabaseError(f"Failed to update Image record: {e}")
+        logger.error(f"Failed to create Image records: {e}")
+        raise DatabaseError(f"Failed to create Image records: {e}")
 
-def mark_original_document_obsolete(document_id: int) -> None:
+def _inserted_split_ids(cursor, first_id: int, count: int, source: Dict[str, Any]) -> List[int]:
     """
-    Mark the original document as Obsolete after successful splitting
+    Read back the IDs of the split rows added by one multi-row INSERT
+    
+    The consecutive range from first_id is checked first. If it does not
+    hold exactly count rows copied from the source, the source's rows from
+    first_id on are read in ID order instead. That order matches the insert
+    order, and the transaction's snapshot hides other sessions' new rows.
     
     Args:
-        document_id: Original document ID to mark as obsolete
+        cursor: Cursor that ran the INSERT
+        first_id: lastrowid of the INSERT
+        count: Number of rows inserted
+        source: Source row with LoanID and OriginalName
+        
+    Returns:
+        list: New Image record IDs, in insert order
+        
+    Raises:
+        DatabaseError: If exactly count new rows cannot be identified
+    """
+    match_sql = """
+        SELECT ID
+        FROM Image
+        WHERE {} AND LoanID <=> %s AND OriginalName <=> %s
+        ORDER BY ID
+    """
+    
+    cursor.execute(match_sql.format("ID BETWEEN %s AND %s"),
+                   (first_id, first_id + count - 1, source['LoanID'], source['OriginalName']))
+    ids = [row['ID'] for row in cursor.fetchall()]
+    if len(ids) == count:
+        return ids
+    
+    logger.warning(f"Image IDs from {first_id} are not consecutive, looking up the {count} new rows")
+    cursor.execute(match_sql.format("ID >= %s") + " LIMIT %s",
+                   (first_id, source['LoanID'], source['OriginalName'], count + 1))
+    ids = [row['ID'] for row in cursor.fetchall()]
+    if len(ids) != count:
+        raise DatabaseError(f"Expected {count} new Image rows from ID {first_id}, found {len(ids)}")
+    return ids
+
+def update_image_records_s3_info_bulk(s3_info: List[Tuple[int, str, str]], conn=None) -> None:
+    """
+    Update several Image records with S3 information in one statement
+    
+    Args:
+        s3_info: (image_id, s3_key, filename) tuples
+        conn: Optional connection from an enclosing db_transaction()
         
     Raises:
         DatabaseError: If database operation fails
     """
+    if not s3_info:
+        return
+    
     try:
-        with get_db_connection() as conn:
+        with db_transaction(conn) as conn:
             cursor = conn.cursor()
             
-            # Update original document status to Obsolete (7)
-            update_sql = """
-                UPDATE Image 
-                SET ImageStatusTypeID = %s, DateUpdated = %s
-                WHERE ID = %s
-            """
-            
-            values = (
-                7,                               # ImageStatusTypeID = 7 (Obsolete)
-                datetime.now(timezone.utc),      # DateUpdated
-                document_id                      # ID
-            )
+            case_clauses = ' '.join(['WHEN %s THEN %s'] * len(s3_info))
+            placeholders = ','.join(['%s'] * len(s3_info))
             
-            cursor.execute(update_sql, values)
+            params: List[Any] = []
+            for image_id, s3_key, _ in s3_info:
+                params.extend((image_id, s3_key))        # Path (S3 key)
+            for image_id, _, filename in s3_info:
+                params.extend((image_id, filename))      # OriginalName
+            params.append(datetime.now(timezone.utc))    # DateUpdated
+            params.extend(image_id for image_id, _, _ in s3_info)
             
-            if cursor.rowcount == 0:
-                raise DatabaseError(f"No Image record found with ID {document_id}")
+            cursor.execute(f"""
+                UPDATE Image 
+                SET Path = CASE ID {case_clauses} END,
+                    OriginalName = CASE ID {case_clauses} END,
+                    DateUpdated = %s
+                WHERE ID IN ({placeholders})
+            """, params)
             
-            conn.commit()
+            if cursor.rowcount != len(s3_info):
+                raise DatabaseError(
+                    f"Expected to update {len(s3_info)} Image records, updated {cursor.rowcount}"
+                )
             
-            logger.info(f"Marked original document {document_id} as Obsolete after splitting")
+            logger.info(f"Updated {len(s3_info)} Image records with S3 info")
             
     except Exception as e:
-        logger.error(f"Failed to mark document {document_id} as obsolete: {e}")
-        raise DatabaseError(f"Failed to mark document as obsolete: {e}")
+        logger.error(f"Failed to update Image records with S3 info: {e}")
+        raise DatabaseError(f"Failed to update Image records: {e}")
 
-def update_bookmark_with_result(bookmark_id: int, result_image_id: int) -> bool:
+def mark_original_document_obsolete(document_id: int, conn=None) -> None:
     """
-    Update ImageBookmark record with the resulting split document ID
+    Mark the original document as Obsolete after successful splitting
     
     Args:
-        bookmark_id: ImageBookmark ID to update
-        result_image_id: New Image ID created from split
-        
-    Returns:
-        bool: True if update successful
+        document_id: Original document ID to mark as obsolete
+        conn: Optional connection from an enclosing db_transaction()
         
     Raises:
-        DatabaseError: If update fails
+        DatabaseError: If database operation fails
     """
     try:
-        with get_db_connection() as conn:
+        with db_transaction(conn) as conn:
             cursor = conn.cursor()
             
+            # Update original document status to Obsolete (7)
             update_sql = """
-                UPDATE ImageBookmark 
-                SET ResultImageID = %s,
-                    DateUpdated = %s
+                UPDATE Image 
+                SET ImageStatusTypeID = %s, DateUpdated = %s
                 WHERE ID = %s
             """
             
-            cursor.execute(update_sql, (
-                result_image_id,
-                datetime.now(timezone.utc),
-                bookmark_id
-            ))
+            values = (
+                7,                               # ImageStatusTypeID = 7 (Obsolete)
+                datetime.now(timezone.utc),      # DateUpdated
+                document_id                      # ID
+            )
             
-            if cursor.rowcount == 0:
-                logger.warning(f"No bookmark found with ID {bookmark_id}")
-                return False
+            cursor.execute(update_sql, values)
             
-            conn.commit()
+            if cursor.rowcount == 0:
+                raise DatabaseError(f"No Image record found with ID {document_id}")
             
-            logger.info(f"Updated bookmark {bookmark_id} with result image {result_image_id}")
-            return True
+            logger.info(f"Marked original document {document_id} as Obsolete after splitting")
             
     except Exception as e:
-        logger.error(f"Failed to update bookmark {bookmark_id}: {e}")
-        raise DatabaseError(f"Failed to update bookmark: {e}")
+        logger.error(f"Failed to mark document {document_id} as obsolete: {e}")
+        raise DatabaseError(f"Failed to mark document as obsolete: {e}")
 
 def update_database_records(source_document_id: int, bookmarks: List[Dict[str, Any]], 
-                          results: List[Dict[str, Any]]) -> bool:
+                          results: List[Dict[str, Any]], conn=None) -> bool:
     """
     Update all database records after successful PDF processing
     
@@ -323,6 +597,7 @@ def update_database_records(source_document_id: int, bookmarks: List[Dict[str, A
         source_document_id: Original document ID
         bookmarks: Original bookmark list
         results: Processing results with new Image IDs
+        conn: Optional connection from an enclosing db_transaction()
         
     Returns:
         bool: True if all updates successful
@@ -331,49 +606,46 @@ def update_database_records(source_document_id: int, bookmarks: List[Dict[str, A
         DatabaseError: If any update fails
     """
     try:
-        with get_db_connection() as conn:
+        with db_transaction(conn) as conn:
             cursor = conn.cursor()
             
-            # Start transaction
-            conn.begin()
+            now = datetime.now(timezone.utc)
+            
+            # Link every bookmark to its result in a single statement
+            bookmark_links = [
+                (result['bookmarkId'], result['resultImageId'])
+                for result in results
+                if result.get('bookmarkId') and result.get('resultImageId')
+            ]
+            
+            if bookmark_links:
+                case_clauses = ' '.join(['WHEN %s THEN %s'] * len(bookmark_links))
+                placeholders = ','.join(['%s'] * len(bookmark_links))
+            
+                params = [value for link in bookmark_links for value in link]
+                params.append(now)
+                params.extend(bookmark_id for bookmark_id, _ in bookmark_links)
+            
+                cursor.execute(f"""
+                    UPDATE ImageBookmark 
+                    SET ResultImageID = CASE ID {case_clauses} END,
+                        DateUpdated = %s
+                    WHERE ID IN ({placeholders})
+                """, params)
+            
+            # Mark source document with processing completion if needed
+            cursor.execute("""
+                UPDATE Image 
+                SET DateUpdated = %s
+                WHERE ID = %s
+            """, (
+                now,
+                source_document_id
+            ))
+            
+            logger.info(f"Successfully updated all database records for document {source_document_id}")
+            return True
             
-            try:
-                # Update each bookmark with its corresponding result
-                for result in results:
-                    bookmark_id = result.get('bookmarkId')
-                    result_image_id = result.get('resultImageId')
-                    
-                    if bookmark_id and result_image_id:
-                        cursor.execute("""
-                            UPDATE ImageBookmark 
-                            SET ResultImageID = %s
-                            WHERE ID = %s
-                        """, (
-                            result_image_id,
-                            bookmark_id
-                        ))
-                
-                # Mark source document with processing completion if needed
-                cursor.execute("""
-                    UPDATE Image 
-                    SET DateUpdated = %s
-                    WHERE ID = %s
-                """, (
-                    datetime.now(timezone.utc),
-                    source_document_id
-                ))
-                
-                # Commit transaction
-                conn.commit()
-                
-                logger.info(f"Successfully updated all database records for document {source_document_id}")
-                return True
-                
-            except Exception as e:
-                # Rollback on any error
-                conn.rollback()
-                raise e
-                
     except Exception as e:
         logger.error(f"Failed to update database records: {e}")
         raise DatabaseError(f"Database update failed: {e}")
@@ -415,39 +687,53 @@ def get_document_info(document_id: int) -> Optional[Dict[str, Any]]:
         logger.error(f"Failed to get document info for {document_id}: {e}")
         return None
 
+def _bookmark_info_sql(chunk_size: int) -> str:
+    """Get the bookmark lookup statement for a given IN-list size, building it once"""
+    sql = _BOOKMARK_INFO_SQL.get(chunk_size)
+    if sql is None:
+        placeholders = ','.join(['%s'] * chunk_size)
+        sql = f"""
+            SELECT ib.ID, ib.ImageID, ib.PageIndex, ib.Text,
+                   ib.ImageDocumentTypeID, ib.ResultImageID,
+                   idtml.Name as DocumentTypeName
+            FROM ImageBookmark ib
+            LEFT JOIN ImageDocTypeMasterList idtml ON ib.ImageDocumentTypeID = idtml.ID
+            WHERE ib.ID IN ({placeholders}) AND ib.Deleted = 0
+        """
+        _BOOKMARK_INFO_SQL[chunk_size] = sql
+    return sql
+
 def get_bookmark_info(bookmark_ids: List[int]) -> List[Dict[str, Any]]:
     """
     Get bookmark information from database
     
+    Duplicate IDs are dropped and the lookup is split into IN-lists of at
+    most BOOKMARK_LOOKUP_CHUNK_SIZE IDs to stay clear of max_allowed_packet.
+    
     Args:
         bookmark_ids: List of bookmark IDs to lookup
         
     Returns:
-        list: Bookmark information records
+        list: Bookmark information records, ordered by page index
     """
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             
-            if not bookmark_ids:
+            unique_ids = list(dict.fromkeys(bookmark_ids))
+            if not unique_ids:
                 return []
             
-            placeholders = ','.join(['%s'] * len(bookmark_ids))
-            
-            cursor.execute(f"""
-                SELECT ib.ID, ib.ImageID, ib.PageIndex, ib.Text,
-                       ib.ImageDocumentTypeID, ib.ResultImageID,
-                       idtml.Name as DocumentTypeName
-                FROM ImageBookmark ib
-                LEFT JOIN ImageDocTypeMasterList idtml ON ib.ImageDocumentTypeID = idtml.ID
-                WHERE ib.ID IN ({placeholders}) AND ib.Deleted = 0
-                ORDER BY ib.PageIndex
-            """, bookmark_ids)
+            results: List[Dict[str, Any]] = []
+            for start in range(0, len(unique_ids), BOOKMARK_LOOKUP_CHUNK_SIZE):
+                chunk = unique_ids[start:start + BOOKMARK_LOOKUP_CHUNK_SIZE]
+                cursor.execute(_bookmark_info_sql(len(chunk)), chunk)
+                results.extend(dict(result) for result in cursor.fetchall())
             
-            results = cursor.fetchall()
+            results.sort(key=lambda result: result['PageIndex'])
             
             logger.info(f"Retrieved {len(results)} bookmark records")
-            return [dict(result) for result in results]
+            return results
             
     except Exception as e:
         logger.error(f"Failed to get bookmark info: {e}")
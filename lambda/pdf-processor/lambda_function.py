@@ -15,37 +15,61 @@ Date: January 2025
 """
 
 import json
+import os
+import orjson
 import logging
 import traceback
-from typing import Dict, List, Any, Optional, Tuple
-import PyPDF2
-import io
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Dict, List, Any, Optional, Tuple
 from datetime import datetime
+import fitz  # PyMuPDF
+from pydantic import BaseModel, ConfigDict, Field, StrictInt, ValidationError
 
 # Import our helper modules
 from s3_operations import (
-    download_pdf_from_s3, upload_split_to_s3, get_s3_bucket_name, 
+    download_pdf_to_tmp, upload_split_to_s3, get_s3_client, get_s3_bucket_name, 
     cleanup_partial_uploads, verify_s3_access
 )
 from database_operations import (
     get_db_connection, 
-    create_image_record, 
-    update_image_record_s3_info,
+    db_transaction,
+    create_image_records_bulk,
+    update_image_records_s3_info_bulk,
     mark_original_document_obsolete,
-    update_bookmark_with_result,
     update_database_records,
     create_processing_session,
-    update_processing_session_status
+    update_processing_session_status,
+    warm_db_connection
 )
 from api_callbacks import (
-    update_processing_status, link_processing_results, 
-    notify_processing_completion, validate_api_connectivity
+    update_processing_status, StatusBatcher, notify_processing_completion,
+    warm_api_session
 )
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Verbose step-by-step handler output. Kept off the root logger's DEBUG level
+# so enabling it does not also turn on boto3/urllib3 wire logging.
+DEBUG_MODE = os.environ.get('DEBUG_MODE') == 'true'
+
+def _debug_log(message: str) -> None:
+    """Log a troubleshooting message when DEBUG_MODE is enabled"""
+    if DEBUG_MODE:
+        logger.info(message)
+
+# Upper bound on concurrent split uploads; stays within the S3 client pool size
+MAX_UPLOAD_WORKERS = 30
+
+# Split PDFs larger than this are spooled to /tmp instead of held in memory
+SPLIT_SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+# Single background worker that fetches the source PDF while the handler
+# makes its opening API calls; reused across warm invocations
+_PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch')
+
 class PDFProcessingError(Exception):
     """Custom exception for PDF processing errors"""
     pass
@@ -54,6 +78,26 @@ class DatabaseError(Exception):
     """Custom exception for database operations"""
     pass
 
+def warmup() -> None:
+    """
+    Pre-open the shared DB connection, and create the HTTP session and S3 client
+    
+    Runs once per container during the Lambda init phase, after PyMuPDF has
+    been imported above. All three live at module scope, so warm invocations
+    reuse them and only the cold start pays the setup cost. Nothing here makes
+    an API call and the DB connect timeout is short, so an unreachable
+    dependency can't push init past its 10 second limit. Set WARMUP_ON_INIT=false to skip.
+    """
+    if os.environ.get('WARMUP_ON_INIT', 'true').lower() != 'true':
+        return
+    
+    get_s3_client()
+    db_ready = warm_db_connection()
+    api_ready = warm_api_session()
+    logger.info(f"Init warmup complete: database={db_ready}, api={api_ready}")
+
+warmup()
+
 def lambda_handler(event, context):
     """
     Main Lambda handler for PDF processing
@@ -65,78 +109,71 @@ def lambda_handler(event, context):
     Returns:
         dict: Processing result with status and details
     """
-    # Enhanced logging for troubleshooting
-    import os
-    print(f"=== LAMBDA HANDLER STARTED ===")
-    print(f"Event type: {type(event)}")
-    print(f"Event content: {event}")
-    print(f"Context: {context}")
-    print(f"Environment variables:")
-    for key, value in os.environ.items():
-        if key.startswith(('DEBUG', 'S3', 'DB', 'API')):
-            print(f"  {key}={value}")
-    print(f"=== LAMBDA HANDLER PROCESSING ===")
-    
-    if os.environ.get('DEBUG_MODE') == 'true':
-        print("DEBUG_MODE is enabled - continuing with verbose logging...")
-    else:
-        print("DEBUG_MODE is not enabled or not set to 'true'")
+    # Verbose troubleshooting output; the event can be large, so it is only
+    # serialized when DEBUG_MODE is on
+    if DEBUG_MODE:
+        _debug_log(f"Event content: {orjson.dumps(event, default=str).decode()}")
+        _debug_log(f"Context: {context}")
+        for key, value in os.environ.items():
+            if key.startswith(('DEBUG', 'S3', 'DB', 'API')):
+                if key.endswith(('PASSWORD', 'TOKEN')):
+                    value = '***'
+                _debug_log(f"Environment: {key}={value}")
     
     session_id = None
+    source_download = None
     
     try:
-        logger.info(f"PDF Processor Lambda started. Event: {json.dumps(event)}")
-        print(f"STEP 1: Starting payload parsing...")
+        logger.info("PDF Processor Lambda started")
+        _debug_log("STEP 1: Starting payload parsing...")
         
         # Parse and validate input payload
         payload = parse_and_validate_payload(event)
         session_id = payload.get('sessionId')
         
-        print(f"STEP 2: Payload parsed successfully - SessionId: {session_id}, DocumentId: {payload['documentId']}")
-        logger.info(f"Processing session {session_id} for document {payload['documentId']}")
+        # Summary fields only; the raw event is dumped under DEBUG_MODE
+        logger.info("Processing session %s for document %s: operation=%s, %d bookmarks",
+                    session_id, payload['documentId'], payload['operation'], len(payload['bookmarks']))
+        
+        # Start fetching the source PDF now so the download overlaps the
+        # session check and status update below
+        source_download = prefetch_source_pdf(payload)
         
         # Verify session exists before starting processing
-        print(f"STEP 3: Verifying processing session exists...")
+        _debug_log("STEP 2: Verifying processing session exists...")
         from api_callbacks import verify_session_exists
         if not verify_session_exists(session_id):
-            print(f"WARNING: Processing session {session_id} not found, attempting to continue anyway...")
+            logger.warning(f"Processing session {session_id} not found, attempting to continue anyway...")
         
         # Update processing status to 'processing'
-        print(f"STEP 4: Updating processing status to 'processing'...")
+        _debug_log("STEP 3: Updating processing status to 'processing'...")
         update_processing_status(session_id, 'processing', progress=10, 
                                 message='Starting PDF processing...')
         
         # Process based on operation type
         operation = payload.get('operation', 'split_document')
-        print(f"STEP 5: Processing operation type: {operation}")
+        _debug_log(f"STEP 4: Processing operation type: {operation}")
         
         if operation == 'split_document':
-            print(f"STEP 6: Starting document splitting process...")
-            results = process_document_splitting(payload)
-            print(f"STEP 7: Document splitting completed - {len(results)} results")
+            results = process_document_splitting(payload, source_download)
+            _debug_log(f"STEP 5: Document splitting completed - {len(results)} results")
         else:
             raise PDFProcessingError(f"Unsupported operation: {operation}")
         
-        # Update processing status to completed
-        print(f"STEP 8: Updating processing status to 'completed'...")
-        update_processing_status(session_id, 'completed', progress=100,
-                                message=f'Successfully processed {len(results)} documents')
+        # Update processing status to completed and link results back to API
+        _debug_log("STEP 6: Updating processing status to 'completed' and linking results...")
+        notify_processing_completion(session_id, payload['documentId'], results)
         
-        # Link results back to API
-        print(f"STEP 9: Linking results back to API...")
-        link_processing_results(payload['documentId'], results)
-        
-        print(f"STEP 10: Processing completed successfully!")
         logger.info(f"Processing completed successfully for session {session_id}")
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'status': 'completed',
                 'sessionId': session_id,
                 'processedDocuments': len(results),
                 'results': results
-            })
+            }).decode()
         }
         
     except Exception as e:
@@ -144,6 +181,11 @@ def lambda_handler(event, context):
         logger.error(f"Lambda processing error: {error_message}")
         logger.error(traceback.format_exc())
         
+        # Remove the prefetched source if the failure came before splitting
+        # could take ownership of it
+        if source_download is not None:
+            discard_source_download(source_download)
+        
         # Update processing status to error
         if session_id:
             try:
@@ -153,13 +195,32 @@ def lambda_handler(event, context):
         
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'status': 'error',
                 'sessionId': session_id,
                 'error': error_message
-            })
+            }).decode()
         }
 
+class BookmarkModel(BaseModel):
+    """Split point in the processing payload; extra fields (documentDate, comments) pass through"""
+    model_config = ConfigDict(extra='allow')
+    
+    bookmarkId: Optional[StrictInt]
+    pageIndex: int = Field(strict=True, ge=0)
+    documentTypeId: Optional[StrictInt]
+    documentTypeName: Optional[str]
+
+class PayloadModel(BaseModel):
+    """Processing payload sent by the API"""
+    model_config = ConfigDict(extra='allow')
+    
+    documentId: int = Field(strict=True, gt=0)
+    sessionId: str = Field(min_length=1)
+    operation: str
+    bookmarks: List[BookmarkModel]
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
 def parse_and_validate_payload(event) -> Dict[str, Any]:
     """
     Parse and validate the Lambda event payload
@@ -174,156 +235,305 @@ def parse_and_validate_payload(event) -> Dict[str, Any]:
         PDFProcessingError: If payload is invalid
     """
     try:
-        # Handle different event formats
-        if isinstance(event, str):
-            payload = json.loads(event)
+        # Handle different event formats. JSON text is parsed and validated
+        # in one pass by pydantic-core.
+        if isinstance(event, (str, bytes)):
+            model = PayloadModel.model_validate_json(event)
+        elif 'body' in event and isinstance(event['body'], (str, bytes)):
+            model = PayloadModel.model_validate_json(event['body'])
         elif 'body' in event:
-            payload = json.loads(event['body']) if isinstance(event['body'], str) else event['body']
+            model = PayloadModel.model_validate(event['body'])
         else:
-            payload = event
-            
-        # Validate required fields
-        required_fields = ['documentId', 'sessionId', 'operation', 'bookmarks']
-        for field in required_fields:
-            if field not in payload:
-                raise PDFProcessingError(f"Missing required field: {field}")
-        
-        # Validate document ID
-        if not isinstance(payload['documentId'], int) or payload['documentId'] <= 0:
-            raise PDFProcessingError("Invalid documentId")
-            
-        # Validate session ID
-        if not payload['sessionId'] or not isinstance(payload['sessionId'], str):
-            raise PDFProcessingError("Invalid sessionId")
-            
-        # Validate bookmarks
-        if not isinstance(payload['bookmarks'], list):
-            raise PDFProcessingError("Bookmarks must be a list")
-            
-        # Validate each bookmark
-        for i, bookmark in enumerate(payload['bookmarks']):
-            required_bookmark_fields = ['bookmarkId', 'pageIndex', 'documentTypeId', 'documentTypeName']
-            for field in required_bookmark_fields:
-                if field not in bookmark:
-                    raise PDFProcessingError(f"Bookmark {i}: missing field {field}")
+            model = PayloadModel.model_validate(event)
+        
+        payload = model.model_dump()
         
         logger.info(f"Payload validation successful for document {payload['documentId']}")
         return payload
         
-    except json.JSONDecodeError as e:
-        raise PDFProcessingError(f"Invalid JSON payload: {e}")
-    except Exception as e:
+    except ValidationError as e:
+        # Also covers malformed JSON text
         raise PDFProcessingError(f"Payload validation failed: {e}")
+    except Exception as e:
+        raise PDFProcessingError(f"Invalid payload: {e}")
 
-def process_document_splitting(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+def is_index_only(bookmarks: List[Dict[str, Any]]) -> bool:
+    """
+    Check for the Index Only case (single bookmark at page 0)
+    
+    Args:
+        bookmarks: Bookmarks from the processing payload
+        
+    Returns:
+        bool: True if the document is renamed rather than split
+    """
+    return len(bookmarks) == 1 and bookmarks[0]['pageIndex'] == 0
+
+def prefetch_source_pdf(payload: Dict[str, Any]) -> Optional[Future]:
+    """
+    Start downloading the source PDF in the background
+    
+    Args:
+        payload: Validated processing payload
+        
+    Returns:
+        Future: Resolves to the local path of the source PDF, or None if the
+        operation does not need the source
+    """
+    if payload['operation'] != 'split_document' or is_index_only(payload['bookmarks']):
+        return None
+    
+    return _PREFETCH_EXECUTOR.submit(download_pdf_to_tmp, payload['documentId'])
+
+def discard_source_download(source_download: Future) -> None:
+    """
+    Delete a prefetched source PDF that will not be split
+    
+    If the download is still running, the file is removed once it finishes.
+    
+    Args:
+        source_download: Future returned by prefetch_source_pdf
+    """
+    def _remove(future: Future) -> None:
+        if future.exception() is not None:
+            return
+        try:
+            os.remove(future.result())
+        except FileNotFoundError:
+            # Already removed by process_document_splitting
+            pass
+    
+    source_download.add_done_callback(_remove)
+
+def process_document_splitting(payload: Dict[str, Any],
+                               source_download: Optional[Future] = None) -> List[Dict[str, Any]]:
     """
     Process document splitting based on bookmarks
     
     Args:
         payload: Processing payload with document and bookmark information
+        source_download: Optional prefetch of the source PDF from
+            prefetch_source_pdf; downloaded here if not given
         
     Returns:
         list: Processing results for each split document
     """
     document_id = payload['documentId']
     bookmarks = payload['bookmarks']
-    metadata = payload.get('metadata', {})
     
     logger.info(f"Starting document splitting for document {document_id} with {len(bookmarks)} bookmarks")
     
-    # Step 1: Download source PDF from S3
-    update_processing_status(payload['sessionId'], 'processing', progress=20,
-                            message='Downloading source PDF...')
-    
-    source_pdf_data = download_pdf_from_s3(document_id)
-    
-    # Step 2: Load and validate PDF
-    update_processing_status(payload['sessionId'], 'processing', progress=30,
-                            message='Loading and validating PDF...')
-    
-    pdf_reader = load_and_validate_pdf(source_pdf_data)
-    total_pages = len(pdf_reader.pages)
-    
-    logger.info(f"Source PDF loaded: {total_pages} pages")
-    
-    # Step 3: Generate split ranges from bookmarks
-    update_processing_status(payload['sessionId'], 'processing', progress=40,
-                            message='Calculating split ranges...')
-    
-    split_ranges = calculate_split_ranges(bookmarks, total_pages)
-    
-    logger.info(f"Generated {len(split_ranges)} split ranges: {split_ranges}")
-    
-    # Handle special case: Index Only (single bookmark at page 0)
-    if not split_ranges:
+    # Index Only (single bookmark at page 0) needs no split, so answer it
+    # before downloading or parsing the source
+    if is_index_only(bookmarks):
         logger.info("Index Only case detected - no splitting required")
         update_processing_status(payload['sessionId'], 'completed', progress=100,
                                 message='Index Only operation - no splitting required')
         return []
     
-    # Step 4: Split PDF and process each section
-    results = []
+    # Intermediate progress is sent in the background so it doesn't block
+    # the split; flushed before the handler sends 'completed' or 'error'
+    status = StatusBatcher(payload['sessionId'])
     
-    for i, split_range in enumerate(split_ranges):
-        progress = 50 + (i * 30 // len(split_ranges))
-        update_processing_status(payload['sessionId'], 'processing', progress=progress,
-                                message=f'Processing split {i+1} of {len(split_ranges)}...')
-        
-        result = process_single_split(pdf_reader, split_range, document_id, metadata)
-        results.append(result)
+    try:
+        # Step 1: Download source PDF from S3
+        status.update(20, 'Downloading source PDF...')
         
-        logger.info(f"Processed split {i+1}: {result}")
+        if source_download is not None:
+            source_pdf_path = source_download.result()
+        else:
+            source_pdf_path = download_pdf_to_tmp(document_id)
+        try:
+            return _split_source_pdf(payload, source_pdf_path, status)
+        finally:
+            # Free the /tmp space for the next warm invocation
+            os.remove(source_pdf_path)
+    finally:
+        status.flush()
+
+def _split_source_pdf(payload: Dict[str, Any], source_pdf_path: str,
+                      status: StatusBatcher) -> List[Dict[str, Any]]:
+    """
+    Split a downloaded source PDF and record the results (steps 2-6)
     
-    update_processing_status(payload['sessionId'], 'processing', progress=80,
-                            message='Updating database records...')
+    Args:
+        payload: Processing payload with document and bookmark information
+        source_pdf_path: Local path of the source PDF
+        status: Batcher for intermediate progress updates
+        
+    Returns:
+        list: Processing results for each split document
+    """
+    document_id = payload['documentId']
+    bookmarks = payload['bookmarks']
+    metadata = payload.get('metadata', {})
     
-    # Step 5: Update database with results
-    update_database_records(document_id, bookmarks, results)
+    # Step 2: Load and validate PDF
+    status.update(30, 'Loading and validating PDF...')
     
-    # Step 6: Mark original document as Obsolete (per Hydra DD design)
-    update_processing_status(payload['sessionId'], 'processing', progress=90,
-                            message='Marking original document as obsolete...')
+    # The source is opened once and every split references its pages; it is
+    # closed as soon as the last split is built
+    pdf_reader = load_and_validate_pdf(source_pdf_path)
+    try:
+        total_pages = pdf_reader.page_count
+        
+        logger.info(f"Source PDF loaded: {total_pages} pages")
+        
+        # Step 3: Generate split ranges from bookmarks
+        status.update(40, 'Calculating split ranges...')
+        
+        split_ranges = calculate_split_ranges(bookmarks, total_pages)
+        
+        # Individual ranges are logged by calculate_split_ranges in DEBUG_MODE
+        logger.info("Generated %d split ranges", len(split_ranges))
+        
+        # Handle special case: Index Only (single bookmark at page 0)
+        if not split_ranges:
+            logger.info("Index Only case detected - no splitting required")
+            status.flush()
+            update_processing_status(payload['sessionId'], 'completed', progress=100,
+                                    message='Index Only operation - no splitting required')
+            return []
+        
+        # Step 4: Split PDF and process each section. All database writes for
+        # the split share one transaction and are committed once at the end.
+        results = []
+        
+        with db_transaction() as conn:
+            # Create every split's Image record up front so each split only has
+            # to upload and fill in its S3 details
+            new_image_ids = create_image_records_bulk(document_id, split_ranges, metadata, conn=conn)
+            
+            # Splits are written here and uploaded on worker threads as soon
+            # as each one is ready
+            max_workers = min(MAX_UPLOAD_WORKERS, len(split_ranges))
+            
+            # A single range covering every page is the source itself, so its
+            # bytes are uploaded as-is rather than rewritten by MuPDF
+            whole_document = (len(split_ranges) == 1
+                              and split_ranges[0]['startPage'] == 0
+                              and split_ranges[0]['endPage'] == total_pages - 1)
+            
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = []
+                for i, (split_range, new_image_id) in enumerate(zip(split_ranges, new_image_ids)):
+                    progress = 50 + (i * 30 // len(split_ranges))
+                    status.update(progress, f'Processing split {i+1} of {len(split_ranges)}...')
+                    
+                    if whole_document:
+                        split_file = open(source_pdf_path, 'rb')
+                    else:
+                        split_file = build_split_file(pdf_reader, split_range)
+                    futures.append(executor.submit(
+                        persist_split, split_file, split_range, document_id, new_image_id
+                    ))
+                
+                # Every split is built, so the source's parsed objects can be
+                # freed while the uploads finish
+                pdf_reader.close()
+                
+                # Collect in submission order so results line up with split_ranges
+                for i, future in enumerate(futures):
+                    result = future.result()
+                    results.append(result)
+                    
+                    if DEBUG_MODE:
+                        _debug_log(f"Processed split {i+1}: {result}")
+            
+            # Update database records with S3 details
+            update_image_records_s3_info_bulk(
+                [(result['resultImageId'], result['s3Key'], result['filename']) for result in results],
+                conn=conn
+            )
+            
+            status.update(80, 'Updating database records...')
+            
+            # Step 5: Update database with results
+            update_database_records(document_id, bookmarks, results, conn=conn)
+            
+            # Step 6: Mark original document as Obsolete (per Hydra DD design)
+            status.update(90, 'Marking original document as obsolete...')
+            
+            mark_original_document_obsolete(document_id, conn=conn)
     
-    mark_original_document_obsolete(document_id)
+    finally:
+        if not pdf_reader.is_closed:
+            pdf_reader.close()
+        # MuPDF keeps decoded fonts and images in a process-wide store that
+        # outlives the document; empty it so warm containers don't accumulate
+        fitz.TOOLS.store_shrink(100)
     
     logger.info(f"Document splitting completed for document {document_id}")
     return results
 
 # download_pdf_from_s3 function is now imported from s3_operations.py
 
-def load_and_validate_pdf(pdf_data: bytes) -> PyPDF2.PdfReader:
+def load_and_validate_pdf(pdf_path: str) -> fitz.Document:
     """
-    Load PDF data and validate structure
+    Load PDF file and validate structure
     
     Args:
-        pdf_data: PDF file bytes
+        pdf_path: Local path of the PDF file
         
     Returns:
-        PyPDF2.PdfReader: PDF reader object
+        fitz.Document: Opened source PDF
         
     Raises:
         PDFProcessingError: If PDF is invalid or corrupted
     """
     try:
-        pdf_stream = io.BytesIO(pdf_data)
-        pdf_reader = PyPDF2.PdfReader(pdf_stream)
-        
-        # Validate PDF structure
-        if len(pdf_reader.pages) == 0:
-            raise PDFProcessingError("PDF contains no pages")
+        # MuPDF parses the xref table and trailer on open, so a corrupted
+        # file fails here. Opening by path lets it read objects from disk on
+        # demand instead of holding the whole file in the heap.
+        pdf_reader = fitz.open(pdf_path, filetype="pdf")
+        
+        try:
+            # Pages of an encrypted source can't be read without the password
+            if pdf_reader.needs_pass:
+                raise PDFProcessingError("PDF is password protected")
             
-        # Test reading first page to ensure PDF is not corrupted
-        first_page = pdf_reader.pages[0]
-        _ = first_page.extract_text()  # This will fail if PDF is corrupted
-        
-        logger.info(f"PDF validation successful: {len(pdf_reader.pages)} pages")
+            # Validate PDF structure
+            if pdf_reader.page_count == 0:
+                raise PDFProcessingError("PDF contains no pages")
+            
+            # Load the first page to catch a broken page tree without
+            # extracting text or rendering any content
+            pdf_reader.load_page(0)
+        except Exception:
+            pdf_reader.close()
+            raise
+        
+        logger.info(f"PDF validation successful: {pdf_reader.page_count} pages")
         return pdf_reader
         
-    except PyPDF2.errors.PdfReadError as e:
+    except PDFProcessingError:
+        raise
+    except fitz.FileDataError as e:
         raise PDFProcessingError(f"PDF is corrupted or invalid: {e}")
     except Exception as e:
         raise PDFProcessingError(f"Failed to load PDF: {e}")
 
+# Label for the pages before the first bookmark
+_UNLABELED_RANGE = {
+    'documentTypeId': None,
+    'documentTypeName': 'Unlabeled Pages',
+    'documentDate': None,
+    'comments': 'Pages before first bookmark',
+    'bookmarkId': None
+}
+
+def _make_split_range(start_page: int, end_page: int, label: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a split range carrying the document type details of a bookmark"""
+    return {
+        'startPage': start_page,
+        'endPage': end_page,
+        'documentTypeId': label['documentTypeId'],
+        'documentTypeName': label['documentTypeName'],
+        'documentDate': label.get('documentDate'),
+        'comments': label.get('comments'),
+        'bookmarkId': label['bookmarkId']
+    }
+
 def calculate_split_ranges(bookmarks: List[Dict], total_pages: int) -> List[Dict[str, Any]]:
     """
     Calculate page ranges for PDF splitting based on bookmarks
@@ -361,116 +571,110 @@ def calculate_split_ranges(bookmarks: List[Dict], total_pages: int) -> List[Dict
     
     ranges = []
     
-    # Process bookmarks to create ranges
-    # Each bookmark creates a range that starts FROM that bookmark's position
+    # Process bookmarks to create ranges in a single pass. Each range runs
+    # up to (but not including) the next split point and takes the document
+    # type of the bookmark that opened it; pages before the first bookmark
+    # are unlabeled. Walking the sorted bookmarks keeps ranges in page order.
+    label = _UNLABELED_RANGE
     current_start = 0
     
-    for i, bookmark in enumerate(sorted_bookmarks):
+    for bookmark in sorted_bookmarks:
         split_point = bookmark['pageIndex']
         
-        # Create a range from current_start up to (but not including) this split point
         if current_start < split_point:
-            if i == 0:
-                # First range: pages before first bookmark are unlabeled
-                ranges.append({
-                    'startPage': current_start,
-                    'endPage': split_point - 1,
-                    'documentTypeId': None,
-                    'documentTypeName': 'Unlabeled Pages',
-                    'documentDate': None,
-                    'comments': 'Pages before first bookmark',
-                    'bookmarkId': None
-                })
-            else:
-                # Subsequent ranges get the PREVIOUS bookmark's document type
-                prev_bookmark = sorted_bookmarks[i-1]
-                ranges.append({
-                    'startPage': current_start,
-                    'endPage': split_point - 1,
-                    'documentTypeId': prev_bookmark['documentTypeId'],
-                    'documentTypeName': prev_bookmark['documentTypeName'],
-                    'documentDate': prev_bookmark.get('documentDate'),
-                    'comments': prev_bookmark.get('comments'),
-                    'bookmarkId': prev_bookmark['bookmarkId']
-                })
-        
-        # Update current_start for next range
+            ranges.append(_make_split_range(current_start, split_point - 1, label))
+        
+        label = bookmark
         current_start = split_point
     
     # Handle remaining pages after the last bookmark
     if current_start < total_pages:
-        last_bookmark = sorted_bookmarks[-1]
-        ranges.append({
-            'startPage': current_start,
-            'endPage': total_pages - 1,
-            'documentTypeId': last_bookmark['documentTypeId'],
-            'documentTypeName': last_bookmark['documentTypeName'],
-            'documentDate': last_bookmark.get('documentDate'),
-            'comments': last_bookmark.get('comments'),
-            'bookmarkId': last_bookmark['bookmarkId']
-        })
-    
-    # Sort ranges by startPage to ensure correct processing order
-    ranges.sort(key=lambda x: x['startPage'])
+        ranges.append(_make_split_range(current_start, total_pages - 1, label))
     
-    logger.info(f"Calculated {len(ranges)} split ranges from {len(bookmarks)} bookmarks:")
-    for i, range_info in enumerate(ranges):
-        logger.info(f"  Range {i+1}: Pages {range_info['startPage']}-{range_info['endPage']} "
-                   f"({range_info['documentTypeName']}, BookmarkId: {range_info['bookmarkId']})")
+    # One line per range only when troubleshooting; documents can carry
+    # hundreds of bookmarks
+    if DEBUG_MODE:
+        for i, range_info in enumerate(ranges):
+            _debug_log(f"  Range {i+1}: Pages {range_info['startPage']}-{range_info['endPage']} "
+                       f"({range_info['documentTypeName']}, BookmarkId: {range_info['bookmarkId']})")
     
     return ranges
 
-def process_single_split(pdf_reader: PyPDF2.PdfReader, split_range: Dict[str, Any], 
-                        source_document_id: int, metadata: Dict[str, Any]) -> Dict[str, Any]:
+def build_split_file(pdf_reader: fitz.Document, split_range: Dict[str, Any]) -> BinaryIO:
     """
-    Process a single PDF split range
+    Write a single PDF split range to a temporary file
+    
+    Runs on the handler thread since the source document is not thread-safe.
+    Split ranges are disjoint, so building them one after another already
+    visits each source page exactly once; only one writer is open at a time
+    so a split can upload while the next one is built.
+    Splits up to SPLIT_SPOOL_MAX_SIZE stay in memory; larger ones spill to
+    /tmp. The caller owns the returned file and must close it.
     
     Args:
         pdf_reader: Source PDF reader
         split_range: Range information with start/end pages
+        
+    Returns:
+        BinaryIO: Split PDF content, rewound to the start
+    """
+    start_page = split_range['startPage']
+    end_page = split_range['endPage']
+    
+    try:
+        _debug_log(f"Processing split: pages {start_page}-{end_page}")
+        
+        # Create new PDF with selected pages. MuPDF copies the page range in
+        # C without re-encoding content streams. Link rebuilding is skipped:
+        # it walks every copied page in Python, and links into other splits
+        # would dangle anyway. The writer is closed right after saving to
+        # free its objects before the next split is built.
+        output_stream = tempfile.SpooledTemporaryFile(max_size=SPLIT_SPOOL_MAX_SIZE)
+        try:
+            with fitz.open() as pdf_writer:
+                pdf_writer.insert_pdf(pdf_reader, from_page=start_page, to_page=end_page,
+                                      annots=True, links=False)
+                
+                # Write the PDF straight into the spool file
+                pdf_writer.save(output_stream, garbage=3, deflate=True)
+        except Exception:
+            output_stream.close()
+            raise
+        
+        output_stream.seek(0)
+        return output_stream
+        
+    except Exception as e:
+        logger.error(f"Failed to process split {start_page}-{end_page}: {e}")
+        raise PDFProcessingError(f"Split processing failed: {e}")
+
+def persist_split(split_file: BinaryIO, split_range: Dict[str, Any],
+                  source_document_id: int, new_image_id: int) -> Dict[str, Any]:
+    """
+    Upload a split PDF to S3 and close its file
+    
+    Safe to run on a worker thread: it only touches S3. The Image record's
+    S3 details are written afterwards on the handler's DB connection.
+    
+    Args:
+        split_file: Split PDF content from build_split_file()
+        split_range: Range information with start/end pages
         source_document_id: Original document ID
-        metadata: Processing metadata
+        new_image_id: Image record ID created for this split
         
     Returns:
         dict: Processing result for this split
     """
+    start_page = split_range['startPage']
+    end_page = split_range['endPage']
+    
     try:
-        start_page = split_range['startPage']
-        end_page = split_range['endPage']
-        
-        logger.info(f"Processing split: pages {start_page}-{end_page}")
-        
-        # Create new PDF with selected pages
-        pdf_writer = PyPDF2.PdfWriter()
-        
-        for page_num in range(start_page, end_page + 1):
-            if page_num < len(pdf_reader.pages):
-                pdf_writer.add_page(pdf_reader.pages[page_num])
-        
-        # Generate PDF bytes
-        output_stream = io.BytesIO()
-        pdf_writer.write(output_stream)
-        split_pdf_data = output_stream.getvalue()
-        output_stream.close()
-        
-        # Create new database record FIRST to get the new image ID
-        new_image_id = create_image_record(
-            source_document_id=source_document_id,
-            split_range=split_range,
-            s3_key=None,  # Will update after upload
-            filename=None,  # Will update after upload
-            page_count=end_page - start_page + 1,
-            metadata=metadata
-        )
-        
         # Generate filename using the NEW image ID
         split_filename = f"{new_image_id}.pdf"
         
         # Upload to S3 with proper filename
-        s3_key = upload_split_to_s3(split_pdf_data, split_filename)
-        
-        # Update database record with S3 details
-        update_image_record_s3_info(new_image_id, s3_key, split_filename)
+        with split_file:
+            s3_key = upload_split_to_s3(split_file, split_filename)
         
         return {
             'originalImageId': source_document_id,
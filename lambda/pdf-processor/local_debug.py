@@ -20,7 +20,13 @@ import sys
 import json
 import logging
 import argparse
+import atexit
+import queue
+import re
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from contextlib import contextmanager
+from dataclasses import dataclass
 from typing import Dict, Any, Optional
 from unittest.mock import Mock, patch
 
@@ -28,30 +34,58 @@ from unittest.mock import Mock, patch
 current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
 
-# Set up logging for debug mode
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('lambda_debug.log')
-    ]
-)
+# Where lambda_debug.log and lambda_result.json are written. Point
+# ESIZZLE_DEBUG_DIR at a tmpfs such as /dev/shm/esizzle for rapid repeat runs.
+debug_output_dir = Path(os.environ.get('ESIZZLE_DEBUG_DIR', current_dir))
+debug_output_dir.mkdir(parents=True, exist_ok=True)
+
+# Generated mock source PDFs by document ID, kept at module scope so each
+# source is only rendered once per run even when the S3 mock is rebuilt
+_generated_pdfs: Dict[int, bytes] = {}
+
+# Set up logging for debug mode. Records are handed to a background listener
+# so console and log file writes don't block the handler being debugged.
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.StreamHandler(sys.stdout),
+    logging.FileHandler(debug_output_dir / 'lambda_debug.log')
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+# The queue handler only merges the message arguments; formatting is done
+# by the listener's handlers
+_log_queue = queue.Queue(-1)
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.DEBUG, handlers=[_queue_handler])
+
+# Stopped at exit so queued records are written before the process ends
+_log_listener = QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
 logger = logging.getLogger(__name__)
 
+# KEY=value lines of a .env file; blank lines, comments and lines without a
+# key are skipped
+_ENV_LINE_RE = re.compile(r'^[ \t]*([^#\s=][^=\n]*?)[ \t]*=[ \t]*(.*?)[ \t\r]*$', re.MULTILINE)
+
+@dataclass(frozen=True)
 class LocalLambdaContext:
     """Mock Lambda context for local testing"""
     
-    def __init__(self):
-        self.function_name = "pdf-processor-local"
-        self.function_version = "$LATEST"
-        self.invoked_function_arn = "arn:aws:lambda:us-east-1:123456789012:function:pdf-processor-local"
-        self.memory_limit_in_mb = 512
-        self.remaining_time_in_millis = 300000  # 5 minutes
-        self.aws_request_id = "local-debug-request-123"
-        self.log_group_name = "/aws/lambda/pdf-processor-local"
-        self.log_stream_name = "2025/01/11/[$LATEST]local-debug"
+    function_name: str = "pdf-processor-local"
+    function_version: str = "$LATEST"
+    invoked_function_arn: str = "arn:aws:lambda:us-east-1:123456789012:function:pdf-processor-local"
+    memory_limit_in_mb: int = 512
+    remaining_time_in_millis: int = 300000  # 5 minutes
+    aws_request_id: str = "local-debug-request-123"
+    log_group_name: str = "/aws/lambda/pdf-processor-local"
+    log_stream_name: str = "2025/01/11/[$LATEST]local-debug"
+
+# Immutable, so one context is shared by every local run
+LOCAL_CONTEXT = LocalLambdaContext()
 
 def setup_local_environment():
     """Set up local environment variables for testing"""
@@ -67,19 +101,15 @@ def setup_local_environment():
         'API_BASE_URL': 'http://localhost:5000',
         'API_SERVICE_TOKEN': 'local-debug-token',
         'API_TIMEOUT': '30',
-        'API_RETRY_ATTEMPTS': '3'
+        'API_RETRY_ATTEMPTS': '3',
+        'WARMUP_ON_INIT': 'false'
     }
     
     # Load from .env file if it exists
     env_file = current_dir / '.env'
     if env_file.exists():
         logger.info(f"Loading environment from {env_file}")
-        with open(env_file, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    default_env[key.strip()] = value.strip()
+        default_env.update(_ENV_LINE_RE.findall(env_file.read_text()))
     
     # Set environment variables
     for key, value in default_env.items():
@@ -138,13 +168,27 @@ def load_test_payload(payload_file: str) -> Dict[str, Any]:
         return create_test_payload()
 
 def mock_s3_operations():
-    """Mock S3 operations for local testing but create real PDFs"""
+    """
+    Mock S3 in-process with moto, backed by realistic generated PDFs
+    
+    The real s3_operations code runs against the in-memory bucket, so
+    downloads, the source cache and split uploads are all exercised.
+    
+    Returns:
+        tuple: (moto mock with start/stop, seed_source_pdf, save_split_pdfs)
+    """
+    import boto3
+    from moto import mock_s3
     from reportlab.pdfgen import canvas
     from reportlab.lib.pagesizes import letter
     import io
     import os
     
-    def mock_download_pdf_from_s3(document_id):
+    def generate_source_pdf(document_id):
+        if document_id in _generated_pdfs:
+            logger.info(f"MOCK: Reusing generated PDF for document {document_id}")
+            return _generated_pdfs[document_id]
+        
         logger.info(f"MOCK: Generating realistic 15-page PDF for document {document_id}")
         
         # Create a realistic 15-page PDF using reportlab
@@ -182,21 +226,33 @@ def mock_s3_operations():
             f.write(pdf_data)
         logger.info(f"MOCK: Source PDF saved to {source_file} ({len(pdf_data)} bytes)")
         
+        _generated_pdfs[document_id] = pdf_data
         return pdf_data
     
-    def mock_upload_split_to_s3(pdf_data, filename):
-        logger.info(f"MOCK: Saving split PDF {filename} to disk ({len(pdf_data)} bytes)")
+    def seed_source_pdf(document_id):
+        bucket_name = os.environ['S3_BUCKET_NAME']
+        s3_key = f"IProcessing/Images/{document_id}.pdf"
         
-        # Save split PDF to disk
-        split_file = f"split_{filename}"
-        with open(split_file, 'wb') as f:
-            f.write(pdf_data)
+        s3_client = boto3.client('s3')
+        s3_client.create_bucket(Bucket=bucket_name)
+        s3_client.put_object(Bucket=bucket_name, Key=s3_key, Body=generate_source_pdf(document_id))
+        logger.info(f"MOCK: Seeded s3://{bucket_name}/{s3_key}")
+    
+    def save_split_pdfs(document_id):
+        bucket_name = os.environ['S3_BUCKET_NAME']
+        source_key = f"IProcessing/Images/{document_id}.pdf"
         
-        mock_s3_key = f"IProcessing/Images/{filename}"
-        logger.info(f"MOCK: Split PDF saved to {split_file}, S3 key: {mock_s3_key}")
-        return mock_s3_key
-    
-    return mock_download_pdf_from_s3, mock_upload_split_to_s3
+        # Copy every uploaded split out of the mock bucket for inspection
+        s3_client = boto3.client('s3')
+        listing = s3_client.list_objects_v2(Bucket=bucket_name, Prefix='IProcessing/Images/')
+        for obj in listing.get('Contents', []):
+            if obj['Key'] == source_key:
+                continue
+            split_file = f"split_{os.path.basename(obj['Key'])}"
+            s3_client.download_file(bucket_name, obj['Key'], split_file)
+            logger.info(f"MOCK: Split PDF saved to {split_file} ({obj['Size']} bytes), S3 key: {obj['Key']}")
+    
+    return mock_s3(), seed_source_pdf, save_split_pdfs
 
 def mock_database_operations():
     """Mock database operations for local testing"""
@@ -204,7 +260,7 @@ def mock_database_operations():
     # Counter for unique image IDs
     _image_id_counter = [1000]
     
-    def mock_create_image_record(source_document_id, split_range, s3_key, filename, page_count, metadata):
+    def mock_create_image_record(source_document_id, split_range, s3_key, filename, page_count, metadata, conn=None):
         # Generate unique image ID for each split
         _image_id_counter[0] += 1
         mock_image_id = _image_id_counter[0]
@@ -213,21 +269,37 @@ def mock_database_operations():
         logger.debug(f"MOCK: S3 key: {s3_key}, filename: {filename}, pages: {page_count}")
         return mock_image_id
     
-    def mock_update_image_record_s3_info(image_id, s3_key, filename):
-        logger.info(f"MOCK: Updated Image record {image_id} with S3 info: {s3_key}")
-        logger.debug(f"MOCK: Filename: {filename}")
+    def mock_create_image_records_bulk(source_document_id, split_ranges, metadata, conn=None):
+        return [
+            mock_create_image_record(source_document_id, split_range, None, None,
+                                     split_range['endPage'] - split_range['startPage'] + 1, metadata)
+            for split_range in split_ranges
+        ]
+    
+    def mock_update_image_records_s3_info_bulk(s3_info, conn=None):
+        for image_id, s3_key, filename in s3_info:
+            logger.info(f"MOCK: Updated Image record {image_id} with S3 info: {s3_key}")
+            logger.debug(f"MOCK: Filename: {filename}")
         return True
     
-    def mock_update_database_records(source_document_id, bookmarks, results):
+    def mock_update_database_records(source_document_id, bookmarks, results, conn=None):
         logger.info(f"MOCK: Updated database records for document {source_document_id}")
         logger.debug(f"MOCK: Updated {len(results)} bookmark results")
         return True
     
-    def mock_mark_original_document_obsolete(document_id):
+    def mock_mark_original_document_obsolete(document_id, conn=None):
         logger.info(f"MOCK: Marked original document {document_id} as obsolete")
         return True
     
-    return mock_create_image_record, mock_update_image_record_s3_info, mock_update_database_records, mock_mark_original_document_obsolete
+    @contextmanager
+    def mock_db_transaction(conn=None):
+        logger.info("MOCK: Opened database transaction")
+        yield conn or Mock()
+        logger.info("MOCK: Committed database transaction")
+    
+    return (mock_create_image_record, mock_create_image_records_bulk,
+            mock_update_image_records_s3_info_bulk, mock_update_database_records,
+            mock_mark_original_document_obsolete, mock_db_transaction)
 
 def mock_api_callbacks():
     """Mock API callbacks for local testing"""
@@ -248,7 +320,14 @@ def mock_api_callbacks():
             logger.debug(f"MOCK API: Result {i+1}: {result.get('resultImageId')} ({result.get('documentTypeName')})")
         return True
     
-    return mock_update_processing_status, mock_link_processing_results
+    def mock_notify_processing_completion(session_id, document_id, results, success=True, error_message=None):
+        logger.info(f"MOCK API: Processing completion - Session: {session_id}, Document: {document_id}, "
+                    f"{len(results)} results")
+        if not success:
+            logger.error(f"MOCK API: Error: {error_message}")
+        return True
+    
+    return mock_update_processing_status, mock_link_processing_results, mock_notify_processing_completion
 
 def run_lambda_locally(payload: Dict[str, Any], use_mocks: bool = True):
     """Run the Lambda function locally with optional mocking"""
@@ -266,27 +345,29 @@ def run_lambda_locally(payload: Dict[str, Any], use_mocks: bool = True):
     if use_mocks:
         logger.info("Setting up mocks for local testing...")
         
-        # Mock S3 operations
-        mock_download, mock_upload = mock_s3_operations()
-        patches.extend([
-            patch('s3_operations.download_pdf_from_s3', side_effect=mock_download),
-            patch('s3_operations.upload_split_to_s3', side_effect=mock_upload)
-        ])
+        # Mock S3 with moto; the bucket is seeded once the mock is started
+        s3_mock, seed_source_pdf, save_split_pdfs = mock_s3_operations()
+        os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+        patches.append(s3_mock)
         
         # Mock database operations
-        mock_create_image, mock_update_image_s3, mock_update_db, mock_mark_obsolete = mock_database_operations()
+        (mock_create_image, mock_create_images_bulk, mock_update_images_s3_bulk,
+         mock_update_db, mock_mark_obsolete, mock_transaction) = mock_database_operations()
         patches.extend([
             patch('database_operations.create_image_record', side_effect=mock_create_image),
-            patch('database_operations.update_image_record_s3_info', side_effect=mock_update_image_s3),
+            patch('database_operations.create_image_records_bulk', side_effect=mock_create_images_bulk),
+            patch('database_operations.update_image_records_s3_info_bulk', side_effect=mock_update_images_s3_bulk),
             patch('database_operations.update_database_records', side_effect=mock_update_db),
-            patch('database_operations.mark_original_document_obsolete', side_effect=mock_mark_obsolete)
+            patch('database_operations.mark_original_document_obsolete', side_effect=mock_mark_obsolete),
+            patch('database_operations.db_transaction', side_effect=mock_transaction)
         ])
         
         # Mock API callbacks
-        mock_status_update, mock_link_results = mock_api_callbacks()
+        mock_status_update, mock_link_results, mock_notify_completion = mock_api_callbacks()
         patches.extend([
             patch('api_callbacks.update_processing_status', side_effect=mock_status_update),
-            patch('api_callbacks.link_processing_results', side_effect=mock_link_results)
+            patch('api_callbacks.link_processing_results', side_effect=mock_link_results),
+            patch('api_callbacks.notify_processing_completion', side_effect=mock_notify_completion)
         ])
     
     # Start all patches
@@ -294,16 +375,20 @@ def run_lambda_locally(payload: Dict[str, Any], use_mocks: bool = True):
         p.start()
     
     try:
+        if use_mocks:
+            seed_source_pdf(payload['documentId'])
+        
         # Import and run the Lambda function
         from lambda_function import lambda_handler
         
-        # Create mock context
-        context = LocalLambdaContext()
-        
-        logger.info(f"Invoking Lambda with payload: {json.dumps(payload, indent=2)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Invoking Lambda with payload: {json.dumps(payload, indent=2)}")
         
         # Execute the Lambda function
-        result = lambda_handler(payload, context)
+        result = lambda_handler(payload, LOCAL_CONTEXT)
+        
+        if use_mocks:
+            save_split_pdfs(payload['documentId'])
         
         logger.info("="*60)
         logger.info("LAMBDA EXECUTION COMPLETED")
@@ -364,9 +449,10 @@ def main():
     result = run_lambda_locally(payload, use_mocks)
     
     # Save result to file
-    result_file = current_dir / 'lambda_result.json'
-    with open(result_file, 'w') as f:
-        json.dump(result, f, indent=2)
+    import orjson
+    
+    result_file = debug_output_dir / 'lambda_result.json'
+    result_file.write_bytes(orjson.dumps(result, option=orjson.OPT_INDENT_2))
     
     logger.info(f"Result saved to {result_file}")
 
@@ -10,17 +10,89 @@ This Lambda function handles PDF document manipulations including:
 Compatible with existing LoanMaster database schema and S3 structure.
 """
 
+import asyncio
 import json
 import traceback
 import logging
 import time
 import os
+import orjson
 from typing import Dict, Any, Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Read once per container; a function's environment is fixed for its lifetime
+LOG_LEVEL = os.environ.get('LOG_LEVEL')
+DEBUG = LOG_LEVEL == 'DEBUG'
+ENVIRONMENT = os.environ.get('ENVIRONMENT', 'unknown')
+
+def _dumps(data: Any) -> str:
+    """Serialize a response body or log payload to a JSON string"""
+    # Integer dict keys are stringified, as json.dumps did
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+
+# Orchestrator method for each supported operation
+OPERATION_HANDLERS = {
+    'process_manipulations': 'process_document_manipulations',
+    'health_check': 'perform_health_check'
+}
+
+# Event loop for await_safe, created on first use and kept for the container
+_EVENT_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+# Managers are created on first use and reused across warm invocations, so
+# the S3 client's connection pool and the resolved DB password survive
+_S3_MANAGER = None
+_DB_MANAGER = None
+
+def get_s3_manager():
+    """Return the container's shared S3Manager"""
+    global _S3_MANAGER
+    if _S3_MANAGER is None:
+        from utils.s3_manager import S3Manager
+        _S3_MANAGER = S3Manager()
+    return _S3_MANAGER
+
+def get_db_manager():
+    """
+    Return the container's shared DatabaseManager
+    
+    Nothing is cached if building the manager raises, such as when its
+    Secrets Manager lookup fails, so the next call tries again.
+    """
+    global _DB_MANAGER
+    if _DB_MANAGER is None:
+        from utils.db_manager import DatabaseManager
+        _DB_MANAGER = DatabaseManager()
+    return _DB_MANAGER
+
+def warmup() -> None:
+    """
+    Import the handler's modules and create the shared S3Manager
+    
+    Runs once per container during the Lambda init phase, so the first
+    invocation finds everything in sys.modules and the S3 client built. The
+    DatabaseManager is left to the first invocation because its Secrets
+    Manager lookup could outlast the 10s init limit. Set WARMUP_ON_INIT=false
+    to skip.
+    """
+    if os.environ.get('WARMUP_ON_INIT', 'true').lower() != 'true':
+        return
+    
+    try:
+        import processors.manipulation_orchestrator  # noqa: F401
+        import utils.progress_tracker  # noqa: F401
+        
+        get_s3_manager()
+        logger.info("Init warmup complete")
+    except Exception as e:
+        # The handler retries the same setup and reports any failure
+        logger.warning(f"Init warmup failed: {e}")
+
+warmup()
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Main Lambda handler for PDF manipulation operations
@@ -36,8 +108,9 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     
     image_id = None
+    progress_tracker = None
     session_id = event.get('sessionId')
-    start_time = time.time()
+    start_ns = time.monotonic_ns()  # Unaffected by wall clock adjustments
     
     try:
         # Validate input
@@ -45,25 +118,29 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         image_id = event.get('imageId')
         timeout_seconds = event.get('timeout', 840)  # 14 minutes default
         
-        logger.info(f"Lambda invoked with event: {json.dumps(event)}")
+        # The full event is only serialized when debug logging is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Lambda invoked with event: {_dumps(event)}")
         
         if not image_id:
             raise ValueError("imageId is required")
             
         if not operation:
             raise ValueError("operation is required")
+        
+        # Rejected before the image is marked InWorkman
+        if operation not in OPERATION_HANDLERS:
+            raise ValueError(f"Unknown operation: {operation}")
             
         logger.info(f"Processing started for image {image_id}, session {session_id}, operation {operation}")
         
         # Import dependencies (lazy loading for faster cold starts)
         from processors.manipulation_orchestrator import ManipulationOrchestrator
-        from utils.s3_manager import S3Manager
-        from utils.db_manager import DatabaseManager
         from utils.progress_tracker import ProgressTracker
         
         # Initialize managers
-        s3_manager = S3Manager()
-        db_manager = DatabaseManager()
+        s3_manager = get_s3_manager()
+        db_manager = get_db_manager()
         progress_tracker = ProgressTracker(session_id, image_id)
         
         # Update initial progress
@@ -81,15 +158,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         )
         
         # Route to appropriate handler
-        if operation == 'process_manipulations':
-            result = orchestrator.process_document_manipulations(image_id)
-        elif operation == 'health_check':
-            result = orchestrator.perform_health_check(image_id)
-        else:
-            raise ValueError(f"Unknown operation: {operation}")
+        result = getattr(orchestrator, OPERATION_HANDLERS[operation])(image_id)
             
         # Calculate processing time
-        processing_time = time.time() - start_time
+        processing_time = (time.monotonic_ns() - start_ns) / 1e9
         result['processingTime'] = processing_time
         
         # Mark as completed successfully
@@ -100,7 +172,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': _dumps({
                 'success': True,
                 'imageId': image_id,
                 'sessionId': session_id,
@@ -110,44 +182,49 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
         
     except Exception as e:
-        processing_time = time.time() - start_time
+        processing_time = (time.monotonic_ns() - start_ns) / 1e9
         error_msg = f"Lambda processing failed for image {image_id}: {str(e)}"
-        logger.error(f"ERROR: {error_msg}")
-        logger.error(f"TRACEBACK: {traceback.format_exc()}")
+        # The logging handler formats the traceback once, at emit time
+        logger.exception(f"ERROR: {error_msg}")
         
         # Handle error recovery
         if image_id:
             try:
-                handle_processing_error(image_id, error_msg, session_id)
+                handle_processing_error(image_id, error_msg, session_id, progress_tracker)
             except Exception as recovery_error:
                 logger.error(f"Error in error handler: {recovery_error}")
             
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': _dumps({
                 'success': False,
                 'error': error_msg,
                 'imageId': image_id,
                 'sessionId': session_id,
                 'processingTime': processing_time,
-                'traceback': traceback.format_exc() if os.environ.get('LOG_LEVEL') == 'DEBUG' else None
+                'traceback': traceback.format_exc() if DEBUG else None
             })
         }
 
-def handle_processing_error(image_id: int, error_msg: str, session_id: Optional[str] = None):
-    """Handle processing errors with database rollback"""
+def handle_processing_error(image_id: int, error_msg: str, session_id: Optional[str] = None,
+                            progress_tracker=None):
+    """
+    Handle processing errors with database rollback
+    
+    Uses the shared DatabaseManager and, when the handler got far enough to
+    create one, the invocation's ProgressTracker.
+    """
     try:
-        from utils.db_manager import DatabaseManager
-        from utils.progress_tracker import ProgressTracker
-        
-        db_manager = DatabaseManager()
+        db_manager = get_db_manager()
         
         # Reset image status to allow retry
         db_manager.update_image_status(image_id, 'NeedsImageManipulation')
         
         # Update progress with error
         if session_id:
-            progress_tracker = ProgressTracker(session_id, image_id)
+            if progress_tracker is None:
+                from utils.progress_tracker import ProgressTracker
+                progress_tracker = ProgressTracker(session_id, image_id)
             await_safe(progress_tracker.update_progress('error', 0, error_msg))
         
         logger.info(f"Error recovery completed for image {image_id}")
@@ -158,16 +235,15 @@ def handle_processing_error(image_id: int, error_msg: str, session_id: Optional[
 def await_safe(coro):
     """
     Safely execute async operations in Lambda context
-    Since Lambda doesn't have an event loop, we handle this gracefully
+    Since Lambda doesn't have an event loop, one is created on the first call
+    and reused by every later call in the same container
     """
+    global _EVENT_LOOP
     try:
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        return loop.run_until_complete(coro)
+        if _EVENT_LOOP is None or _EVENT_LOOP.is_closed():
+            _EVENT_LOOP = asyncio.new_event_loop()
+            asyncio.set_event_loop(_EVENT_LOOP)
+        return _EVENT_LOOP.run_until_complete(coro)
     except Exception as e:
         logger.warning(f"Async operation failed: {e}")
         return None
@@ -176,25 +252,22 @@ def await_safe(coro):
 def health_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Simple health check handler"""
     try:
-        from utils.db_manager import DatabaseManager
-        from utils.s3_manager import S3Manager
-        
         # Test database connection
-        db_manager = DatabaseManager()
+        db_manager = get_db_manager()
         db_healthy = db_manager.test_connection()
         
         # Test S3 connection
-        s3_manager = S3Manager()
+        s3_manager = get_s3_manager()
         s3_healthy = s3_manager.test_connection()
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': _dumps({
                 'status': 'healthy' if db_healthy and s3_healthy else 'unhealthy',
                 'database': 'healthy' if db_healthy else 'unhealthy', 
                 's3': 'healthy' if s3_healthy else 'unhealthy',
                 'timestamp': time.time(),
-                'environment': os.environ.get('ENVIRONMENT', 'unknown')
+                'environment': ENVIRONMENT
             })
         }
         
@@ -202,7 +275,7 @@ def health_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         logger.error(f"Health check failed: {e}")
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': _dumps({
                 'status': 'unhealthy',
                 'error': str(e),
                 'timestamp': time.time()
@@ -9,6 +9,19 @@ Contains specialized processors for different types of PDF manipulations:
 - ManipulationOrchestrator: Coordinates all manipulation types
 """
 
+import os
+
+# Save options shared by the processors. garbage=3 drops objects orphaned by
+# deleted or replaced pages and merges duplicates, deflate compresses streams
+# written uncompressed and clean tidies content stream syntax. Set
+# PDF_SAVE_GARBAGE=1 where save latency matters more than output size.
+PDF_SAVE_OPTIONS = {
+    'garbage': int(os.environ.get('PDF_SAVE_GARBAGE', '3')),
+    'deflate': True,
+    'clean': True
+}
+
+# Imported after PDF_SAVE_OPTIONS, which each processor reads from the package
 from .redaction_processor import RedactionProcessor
 from .rotation_processor import RotationProcessor
 from .deletion_processor import DeletionProcessor
@@ -7,18 +7,71 @@ Maintains compatibility with existing Hydra ImagePageDeletion database schema.
 
 import fitz
 import logging
-from typing import List, Dict, Any, Tuple
-from io import BytesIO
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+
+from processors import PDF_SAVE_OPTIONS
 
 logger = logging.getLogger(__name__)
 
+@dataclass
+class DeletionAnalysis:
+    """Page deletions sorted into valid and invalid records"""
+    valid: List[Dict[str, Any]] = field(default_factory=list)
+    invalid: List[Tuple[Dict[str, Any], str]] = field(default_factory=list)
+    unique_pages: List[int] = field(default_factory=list)
+    
+    @property
+    def duplicate_count(self) -> int:
+        return len(self.valid) - len(self.unique_pages)
+
+def analyze_deletions(deletions: List[Dict[str, Any]], page_count: int) -> DeletionAnalysis:
+    """
+    Validate a batch of page deletions in a single pass
+    
+    Shared by the processor, the impact analysis and the batch validator so
+    each reads the same results instead of re-walking the deletions.
+    
+    Args:
+        deletions: Page deletion records from ImagePageDeletion table
+        page_count: Number of pages in the document
+        
+    Returns:
+        DeletionAnalysis with valid records, invalid records paired with the
+        reason they were rejected, and the sorted unique page indices
+    """
+    analysis = DeletionAnalysis()
+    pages = set()
+    
+    for deletion in deletions:
+        error = _page_index_error(deletion.get('PageIndex'), page_count)
+        if error:
+            analysis.invalid.append((deletion, error))
+        else:
+            analysis.valid.append(deletion)
+            pages.add(deletion['PageIndex'])
+    
+    analysis.unique_pages = sorted(pages)
+    return analysis
+
+def _page_index_error(page_index: Any, page_count: int) -> Optional[str]:
+    """Return why a deletion's page index is invalid, or None if it is valid"""
+    if page_index is None:
+        return "Missing PageIndex in deletion record"
+    if not isinstance(page_index, int):
+        return f"PageIndex must be integer, got {type(page_index)}"
+    if page_index < 0 or page_index >= page_count:
+        return f"PageIndex {page_index} out of range (0-{page_count-1})"
+    return None
+
 class DeletionProcessor:
     """Handle PDF page deletion operations"""
     
     def __init__(self, db_manager):
         self.db_manager = db_manager
     
-    def process(self, image_id: int, pdf_bytes: bytes, deletions: List[Dict[str, Any]]) -> Tuple[bytes, Dict[str, Any]]:
+    def process(self, image_id: int, pdf_bytes: Optional[bytes], deletions: List[Dict[str, Any]],
+                doc: Optional[fitz.Document] = None) -> Tuple[Optional[bytes], Dict[str, Any]]:
         """
         Remove specified pages from PDF document
         
@@ -26,6 +79,9 @@ class DeletionProcessor:
             image_id: Database image ID
             pdf_bytes: PDF content to modify  
             deletions: List of page deletion records from ImagePageDeletion table
+            doc: Already open document to modify in place instead of parsing
+                pdf_bytes. The caller keeps ownership: it is neither saved nor
+                closed here, and None is returned in place of the bytes.
             
         Returns:
             Tuple of (modified_pdf_bytes, processing_result)
@@ -36,7 +92,9 @@ class DeletionProcessor:
         
         logger.info(f"Processing {len(deletions)} page deletions for image {image_id}")
         
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        owns_doc = doc is None
+        if owns_doc:
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
         original_page_count = len(doc)
         
         result = {
@@ -49,34 +107,32 @@ class DeletionProcessor:
         }
         
         try:
-            # Extract and validate page indices to delete (0-based from DB)
-            pages_to_delete = []
-            for deletion in deletions:
-                page_index = deletion.get('PageIndex')
-                if self._validate_page_deletion(deletion, original_page_count):
-                    pages_to_delete.append(page_index)
-                    result['deletedPages'].append({
-                        'pageIndex': page_index,
-                        'deletionId': deletion.get('ID'),
-                        'deletedBy': deletion.get('CreatedBy'),
-                        'deletedAt': deletion.get('DateCreated')
-                    })
-                else:
-                    result['skippedDeletions'].append({
-                        'deletion': deletion,
-                        'reason': 'Invalid page index or deletion data'
-                    })
+            # Validate page indices to delete (0-based from DB)
+            analysis = analyze_deletions(deletions, original_page_count)
+            for deletion in analysis.valid:
+                result['deletedPages'].append({
+                    'pageIndex': deletion['PageIndex'],
+                    'deletionId': deletion.get('ID'),
+                    'deletedBy': deletion.get('CreatedBy'),
+                    'deletedAt': deletion.get('DateCreated')
+                })
+            for deletion, error in analysis.invalid:
+                logger.error(f"Skipping page deletion {deletion.get('ID')}: {error}")
+                result['skippedDeletions'].append({
+                    'deletion': deletion,
+                    'reason': 'Invalid page index or deletion data'
+                })
             
-            # Remove duplicates and sort
-            pages_to_delete = sorted(list(set(pages_to_delete)), reverse=True)
+            pages_to_delete = analysis.unique_pages
             
-            logger.info(f"Valid pages to delete: {pages_to_delete}")
+            logger.debug("Valid pages to delete: %s", pages_to_delete)
             
             # Check if all pages are being deleted
             if len(pages_to_delete) >= original_page_count:
                 # Mark entire document as deleted in database
                 self.db_manager.mark_image_deleted(image_id)
-                doc.close()
+                if owns_doc:
+                    doc.close()
                 
                 logger.info(f"All pages deleted - marking image {image_id} as deleted")
                 result.update({
@@ -94,74 +150,44 @@ class DeletionProcessor:
                     'finalPageCount': original_page_count,
                     'message': 'No valid pages to delete'
                 })
-                doc.close()
+                if owns_doc:
+                    doc.close()
                 return pdf_bytes, result
             
-            # Delete pages in reverse order to maintain indices
-            deleted_count = 0
-            for page_index in pages_to_delete:
-                if page_index < len(doc):  # Double-check bounds after previous deletions
-                    doc.delete_page(page_index)
-                    deleted_count += 1
-                    logger.info(f"Deleted page {page_index}")
-                else:
-                    logger.warning(f"Page {page_index} no longer exists (already deleted or invalid)")
+            # Delete every page in one call so the page tree is rebuilt once
+            # rather than per page. Indices were validated against the
+            # original page count and deduplicated above.
+            doc.delete_pages(pages_to_delete)
+            deleted_count = len(pages_to_delete)
             
             result['finalPageCount'] = len(doc)
             result['actualDeletions'] = deleted_count
             
             logger.info(f"Deleted {deleted_count} pages, final page count: {result['finalPageCount']}")
             
-            # Update page count in database
-            if result['finalPageCount'] != original_page_count:
-                self.db_manager.update_page_count(image_id, result['finalPageCount'])
-            
-            # Mark deletion records as processed
-            for deletion in deletions:
-                if deletion.get('PageIndex') in [d['pageIndex'] for d in result['deletedPages']]:
-                    try:
-                        # In the original system, page deletions are permanent
-                        # We keep the record for audit purposes
-                        self.db_manager.mark_page_deletion_processed(deletion.get('ID'))
-                    except Exception as e:
-                        logger.error(f"Failed to mark deletion {deletion.get('ID')} as processed: {e}")
+            # Update page count and mark deletion records as processed in one
+            # transaction. In the original system, page deletions are
+            # permanent; we keep the records for audit purposes.
+            processed_ids = [deletion.get('ID') for deletion in analysis.valid]
+            new_page_count = (result['finalPageCount']
+                              if result['finalPageCount'] != original_page_count else None)
+            self.db_manager.complete_page_deletions(image_id, new_page_count, processed_ids)
             
             # Save modified document
-            output_buffer = BytesIO()
-            doc.save(output_buffer, incremental=False)
-            doc.close()
+            pdf_out = None
+            if owns_doc:
+                pdf_out = doc.tobytes(**PDF_SAVE_OPTIONS)
+                doc.close()
             
             logger.info(f"Page deletion processing completed: {deleted_count} pages removed")
             
-            return output_buffer.getvalue(), result
+            return pdf_out, result
             
         except Exception as e:
-            doc.close()
+            if owns_doc:
+                doc.close()
             raise Exception(f"Page deletion processing failed: {str(e)}")
     
-    def _validate_page_deletion(self, deletion: Dict[str, Any], page_count: int) -> bool:
-        """Validate page deletion data"""
-        
-        # Check required fields
-        required_fields = ['PageIndex']
-        for field in required_fields:
-            if field not in deletion:
-                logger.error(f"Missing required field {field} in deletion data")
-                return False
-        
-        page_index = deletion['PageIndex']
-        
-        # Validate page index
-        if not isinstance(page_index, int):
-            logger.error(f"Page index must be integer, got {type(page_index)}")
-            return False
-        
-        if page_index < 0 or page_index >= page_count:
-            logger.error(f"Invalid page index {page_index} (document has {page_count} pages)")
-            return False
-        
-        return True
-    
     def get_deletion_impact_analysis(self, deletions: List[Dict[str, Any]], page_count: int) -> Dict[str, Any]:
         """
         Analyze the impact of planned deletions
@@ -179,17 +205,11 @@ class DeletionProcessor:
             'recommendations': []
         }
         
-        # Extract page indices
-        page_indices = []
-        for deletion in deletions:
-            page_index = deletion.get('PageIndex')
-            if page_index is not None and 0 <= page_index < page_count:
-                page_indices.append(page_index)
-            else:
-                analysis['errors'].append(f"Invalid page index: {page_index}")
+        deletion_analysis = analyze_deletions(deletions, page_count)
+        analysis['errors'] = [f"Invalid page index: {deletion.get('PageIndex')}"
+                              for deletion, _ in deletion_analysis.invalid]
         
-        # Remove duplicates
-        unique_pages = list(set(page_indices))
+        unique_pages = deletion_analysis.unique_pages
         analysis['uniquePagesToDelete'] = len(unique_pages)
         analysis['pagesRemaining'] = page_count - len(unique_pages)
         
@@ -200,11 +220,10 @@ class DeletionProcessor:
             analysis['warnings'].append("More than 80% of pages will be deleted")
             analysis['recommendations'].append("Consider if document splitting would be more appropriate")
         
-        if len(page_indices) != len(unique_pages):
-            analysis['warnings'].append(f"Duplicate page deletions found: {len(page_indices) - len(unique_pages)} duplicates")
+        if deletion_analysis.duplicate_count:
+            analysis['warnings'].append(f"Duplicate page deletions found: {deletion_analysis.duplicate_count} duplicates")
         
         # Check for consecutive page deletions
-        unique_pages.sort()
         consecutive_ranges = self._find_consecutive_ranges(unique_pages)
         if any(end - start >= 5 for start, end in consecutive_ranges):
             analysis['recommendations'].append("Large consecutive page ranges detected - consider document splitting")
@@ -218,16 +237,14 @@ class DeletionProcessor:
             return []
         
         ranges = []
-        start = page_indices[0]
-        end = start
+        start = end = page_indices[0]
         
-        for i in range(1, len(page_indices)):
-            if page_indices[i] == end + 1:
-                end = page_indices[i]
+        for page_index in page_indices[1:]:
+            if page_index == end + 1:
+                end = page_index
             else:
                 ranges.append((start, end))
-                start = page_indices[i]
-                end = start
+                start = end = page_index
         
         ranges.append((start, end))
         return ranges
@@ -244,44 +261,22 @@ class DeletionValidator:
             Validation results with issues and recommendations
         """
         
+        analysis = analyze_deletions(deletions, page_count)
+        
         validation = {
             'valid': True,
-            'errors': [],
+            'errors': [error for _, error in analysis.invalid],
             'warnings': [],
-            'validDeletions': [],
-            'invalidDeletions': []
+            'validDeletions': analysis.valid,
+            'invalidDeletions': [deletion for deletion, _ in analysis.invalid]
         }
         
-        page_indices = []
-        
-        for deletion in deletions:
-            page_index = deletion.get('PageIndex')
-            
-            # Basic validation
-            if page_index is None:
-                validation['errors'].append("Missing PageIndex in deletion record")
-                validation['invalidDeletions'].append(deletion)
-                continue
-            
-            if not isinstance(page_index, int):
-                validation['errors'].append(f"PageIndex must be integer, got {type(page_index)}")
-                validation['invalidDeletions'].append(deletion)
-                continue
-            
-            if page_index < 0 or page_index >= page_count:
-                validation['errors'].append(f"PageIndex {page_index} out of range (0-{page_count-1})")
-                validation['invalidDeletions'].append(deletion)
-                continue
-            
-            page_indices.append(page_index)
-            validation['validDeletions'].append(deletion)
-        
         # Check for duplicates
-        if len(page_indices) != len(set(page_indices)):
+        if analysis.duplicate_count:
             validation['warnings'].append("Duplicate page deletions detected")
         
         # Check if all pages being deleted
-        if len(set(page_indices)) >= page_count:
+        if len(analysis.unique_pages) >= page_count:
             validation['warnings'].append("All pages will be deleted - document will be marked as deleted")
         
         # Set overall validity
@@ -320,44 +315,31 @@ class DeletionOptimizer:
         # Sort by page index
         sorted_deletions = sorted(deletions, key=lambda d: d.get('PageIndex', 0))
         
-        # Group consecutive pages
-        merged = []
-        current_group = [sorted_deletions[0]]
+        # Group consecutive pages, tracking the previous index directly
+        # instead of reading it back from each group's last record
+        groups = [[sorted_deletions[0]]]
+        last_page = sorted_deletions[0].get('PageIndex')
         
-        for i in range(1, len(sorted_deletions)):
-            current_page = sorted_deletions[i].get('PageIndex')
-            last_page = current_group[-1].get('PageIndex')
-            
-            if current_page == last_page + 1:
-                current_group.append(sorted_deletions[i])
+        for deletion in sorted_deletions[1:]:
+            page_index = deletion.get('PageIndex')
+            if page_index == last_page + 1:
+                groups[-1].append(deletion)
             else:
-                # Process current group
-                if len(current_group) > 1:
-                    # Create range deletion record
-                    range_deletion = {
-                        'PageIndexStart': current_group[0].get('PageIndex'),
-                        'PageIndexEnd': current_group[-1].get('PageIndex'),
-                        'Count': len(current_group),
-                        'Type': 'range',
-                        'OriginalDeletions': current_group
-                    }
-                    merged.append(range_deletion)
-                else:
-                    merged.extend(current_group)
-                
-                current_group = [sorted_deletions[i]]
-        
-        # Process final group
-        if len(current_group) > 1:
-            range_deletion = {
-                'PageIndexStart': current_group[0].get('PageIndex'),
-                'PageIndexEnd': current_group[-1].get('PageIndex'),
-                'Count': len(current_group),
-                'Type': 'range',
-                'OriginalDeletions': current_group
-            }
-            merged.append(range_deletion)
-        else:
-            merged.extend(current_group)
+                groups.append([deletion])
+            last_page = page_index
+        
+        merged = []
+        for group in groups:
+            if len(group) > 1:
+                # Create range deletion record
+                merged.append({
+                    'PageIndexStart': group[0].get('PageIndex'),
+                    'PageIndexEnd': group[-1].get('PageIndex'),
+                    'Count': len(group),
+                    'Type': 'range',
+                    'OriginalDeletions': group
+                })
+            else:
+                merged.extend(group)
         
         return merged
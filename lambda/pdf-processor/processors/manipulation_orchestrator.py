@@ -8,11 +8,48 @@ the existing Hydra system architecture.
 
 import logging
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from typing import Dict, Any, List, Optional
-from io import BytesIO
+
+import fitz
+
+from processors import PDF_SAVE_OPTIONS
+from processors.redaction_processor import RedactionProcessor
+from processors.rotation_processor import RotationProcessor
+from processors.deletion_processor import DeletionProcessor
+from processors.splitting_processor import SplittingProcessor
 
 logger = logging.getLogger(__name__)
 
+# Creates the RedactOriginal backup while the processors run; reused across
+# warm invocations
+_BACKUP_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='backup')
+
+def wait_for_backup(backup_upload: Optional[Future]) -> None:
+    """
+    Block until a backup copy started by the orchestrator has finished
+    
+    Args:
+        backup_upload: Future returned by submitting the copy, or None if
+            no backup was needed
+    """
+    if backup_upload is None:
+        return
+    
+    if backup_upload.result():
+        logger.info("Backup created in RedactOriginal path")
+    else:
+        logger.warning("Backup copy to RedactOriginal path failed")
+
+def release_pdf_store() -> None:
+    """
+    Empty MuPDF's process-wide store of decoded fonts and images
+    
+    The store outlives the documents that filled it, so without this each
+    warm invocation adds to the container's resident memory.
+    """
+    fitz.TOOLS.store_shrink(100)
+
 class ManipulationOrchestrator:
     """
     Orchestrates PDF manipulation operations in the correct order:
@@ -49,12 +86,19 @@ class ManipulationOrchestrator:
         if not image_record:
             raise ValueError(f"Image record not found: {image_id}")
         
-        # Get all manipulation data
+        # Get all manipulation data. One query counts every kind and only the
+        # non-empty kinds are fetched, so an image with nothing pending costs
+        # a single round trip; if the count fails, everything is fetched.
+        counts = self.db_manager.get_manipulation_counts(image_id)
+        fetchers = {
+            'redactions': self.db_manager.get_pending_redactions,
+            'rotations': self.db_manager.get_rotations,
+            'deletions': self.db_manager.get_page_deletions,
+            'pageBreaks': self.db_manager.get_page_breaks
+        }
         manipulations = {
-            'redactions': self.db_manager.get_pending_redactions(image_id),
-            'rotations': self.db_manager.get_rotations(image_id),
-            'deletions': self.db_manager.get_page_deletions(image_id),
-            'pageBreaks': self.db_manager.get_page_breaks(image_id)
+            kind: fetch(image_id) if counts is None or counts.get(kind) else []
+            for kind, fetch in fetchers.items()
         }
         
         logger.info(f"Found manipulations: {len(manipulations['redactions'])} redactions, "
@@ -85,6 +129,9 @@ class ManipulationOrchestrator:
             'processingTime': 0
         }
         
+        backup_upload = None
+        doc = None
+        
         try:
             # Create backup if manipulations will be applied
             has_file_manipulations = (manipulations.get('redactions') or 
@@ -94,20 +141,28 @@ class ManipulationOrchestrator:
             if has_file_manipulations:
                 self.progress_tracker.update_progress('processing', 35, 'Creating backup...')
                 redact_original_path = f"RedactOriginal/{image_record['Path']}/{image_id}/{image_id}.pdf"
-                self.s3_manager.upload_file(pdf_bytes, redact_original_path, image_record['BucketPrefix'])
-                logger.info("Backup created in RedactOriginal path")
+                # Copied server-side from the object just downloaded, so the PDF
+                # isn't sent back up. Nothing below depends on the backup; it
+                # runs alongside the processors and is waited on before the
+                # processed PDF replaces the source.
+                backup_upload = _BACKUP_EXECUTOR.submit(
+                    self.s3_manager.copy_file, processing_path, redact_original_path
+                )
+            
+            # The document is parsed once; each processor modifies it in place
+            # and it is serialized a single time before the upload below
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+            result['originalPageCount'] = doc.page_count
             
             # Process manipulations in correct order
-            modified_pdf = pdf_bytes
             
             # 1. Apply redactions first (they need to be rasterized for security)
             if manipulations.get('redactions'):
                 self.progress_tracker.update_progress('processing', 45, 'Applying redactions...')
                 
-                from processors.redaction_processor import RedactionProcessor
                 processor = RedactionProcessor(self.db_manager)
-                modified_pdf, redaction_result = processor.process(
-                    image_id, modified_pdf, manipulations['redactions']
+                _, redaction_result = processor.process(
+                    image_id, None, manipulations['redactions'], doc=doc
                 )
                 result['operationsApplied'].append('redactions')
                 result['redactionResult'] = redaction_result
@@ -121,10 +176,9 @@ class ManipulationOrchestrator:
             if manipulations.get('rotations'):
                 self.progress_tracker.update_progress('processing', 60, 'Applying rotations...')
                 
-                from processors.rotation_processor import RotationProcessor
                 processor = RotationProcessor(self.db_manager)
-                modified_pdf, rotation_result = processor.process(
-                    image_id, modified_pdf, manipulations['rotations']
+                _, rotation_result = processor.process(
+                    image_id, None, manipulations['rotations'], doc=doc
                 )
                 result['operationsApplied'].append('rotations')
                 result['rotationResult'] = rotation_result
@@ -134,10 +188,9 @@ class ManipulationOrchestrator:
             if manipulations.get('deletions'):
                 self.progress_tracker.update_progress('processing', 75, 'Deleting pages...')
                 
-                from processors.deletion_processor import DeletionProcessor
                 processor = DeletionProcessor(self.db_manager)
-                modified_pdf, deletion_result = processor.process(
-                    image_id, modified_pdf, manipulations['deletions']
+                _, deletion_result = processor.process(
+                    image_id, None, manipulations['deletions'], doc=doc
                 )
                 result['operationsApplied'].append('deletions')
                 result['deletionResult'] = deletion_result
@@ -148,10 +201,9 @@ class ManipulationOrchestrator:
             if manipulations.get('pageBreaks'):
                 self.progress_tracker.update_progress('processing', 85, 'Splitting document...')
                 
-                from processors.splitting_processor import SplittingProcessor
                 processor = SplittingProcessor(self.db_manager, self.s3_manager)
                 split_result = processor.process(
-                    image_record, modified_pdf, manipulations['pageBreaks']
+                    image_record, None, manipulations['pageBreaks'], doc=doc
                 )
                 result['operationsApplied'].append('splitting')
                 result['splitResult'] = split_result
@@ -163,11 +215,18 @@ class ManipulationOrchestrator:
                     logger.info(f"Document split into {len(result['splitImages'])} new documents")
                     
                     # Don't save the processed PDF back - it's been split
+                    wait_for_backup(backup_upload)
                     result['processingTime'] = time.time() - start_time
                     return result
             
             # Save processed PDF back to S3 (only if not split)
             self.progress_tracker.update_progress('processing', 95, 'Saving processed document...')
+            save_options = dict(PDF_SAVE_OPTIONS)
+            if 'redactions' in result['operationsApplied']:
+                # Redacted documents are written without encryption
+                save_options['encryption'] = fitz.PDF_ENCRYPT_NONE
+            modified_pdf = doc.tobytes(**save_options)
+            wait_for_backup(backup_upload)
             self.s3_manager.upload_file(modified_pdf, processing_path, image_record['BucketPrefix'])
             
             # Update page count if it changed
@@ -181,7 +240,15 @@ class ManipulationOrchestrator:
             
         except Exception as e:
             logger.error(f"Error during manipulation processing: {e}")
+            # Don't leave the upload running into a frozen container
+            if backup_upload is not None:
+                wait([backup_upload])
             raise
+        
+        finally:
+            if doc is not None:
+                doc.close()
+            release_pdf_store()
     
     def perform_health_check(self, image_id: int) -> Dict[str, Any]:
         """
@@ -224,7 +291,6 @@ class ManipulationOrchestrator:
             
             # Test PyMuPDF functionality
             try:
-                import fitz
                 test_doc = fitz.open()
                 test_page = test_doc.new_page()
                 test_doc.close()
@@ -254,15 +320,3 @@ class ManipulationOrchestrator:
             logger.error(f"Health check failed: {e}")
         
         return health_result
-
-    def _get_original_page_count(self, pdf_bytes: bytes) -> int:
-        """Get the original page count from PDF"""
-        try:
-            import fitz
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            page_count = len(doc)
-            doc.close()
-            return page_count
-        except Exception as e:
-            logger.warning(f"Could not determine page count: {e}")
-            return 0
@@ -7,8 +7,9 @@ Maintains compatibility with existing Hydra ImageRedaction database schema.
 
 import fitz  # PyMuPDF
 import logging
-from typing import List, Tuple, Dict, Any
-from io import BytesIO
+from typing import List, Tuple, Dict, Any, Optional
+
+from processors import PDF_SAVE_OPTIONS
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +19,8 @@ class RedactionProcessor:
     def __init__(self, db_manager):
         self.db_manager = db_manager
     
-    def process(self, image_id: int, pdf_bytes: bytes, redactions: List[Dict[str, Any]]) -> Tuple[bytes, Dict[str, Any]]:
+    def process(self, image_id: int, pdf_bytes: Optional[bytes], redactions: List[Dict[str, Any]],
+                doc: Optional[fitz.Document] = None) -> Tuple[Optional[bytes], Dict[str, Any]]:
         """
         Apply redactions to PDF document
         
@@ -26,6 +28,9 @@ class RedactionProcessor:
             image_id: Database image ID
             pdf_bytes: Original PDF content
             redactions: List of redaction areas from ImageRedaction table
+            doc: Already open document to modify in place instead of parsing
+                pdf_bytes. The caller keeps ownership: it is neither saved nor
+                closed here, and None is returned in place of the bytes.
             
         Returns:
             Tuple of (modified_pdf_bytes, processing_result)
@@ -37,7 +42,9 @@ class RedactionProcessor:
         logger.info(f"Processing {len(redactions)} redactions for image {image_id}")
         
         # Load PDF document
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        owns_doc = doc is None
+        if owns_doc:
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
         original_page_count = len(doc)
         
         result = {
@@ -59,14 +66,15 @@ class RedactionProcessor:
             
             logger.info(f"Redactions grouped across {len(redactions_by_page)} pages")
             
-            # Apply redactions page by page
+            # Apply redactions page by page. Per-page detail is logged at
+            # DEBUG; the totals are logged once when processing completes.
             for page_num, page_redactions in redactions_by_page.items():
                 if page_num >= len(doc):
                     logger.warning(f"Skipping redactions on invalid page {page_num} (document has {len(doc)} pages)")
                     continue
                     
                 page = doc[page_num]
-                logger.info(f"Processing {len(page_redactions)} redactions on page {page_num}")
+                logger.debug("Processing %d redactions on page %d", len(page_redactions), page_num)
                 
                 # Apply each redaction on this page
                 applied_on_page = []
@@ -90,7 +98,7 @@ class RedactionProcessor:
                     if rasterized:
                         result['rasterizedPages'].append(page_num)
                         
-                    logger.info(f"Applied {len(applied_on_page)} redactions on page {page_num}")
+                    logger.debug("Applied %d redactions on page %d", len(applied_on_page), page_num)
             
             # Mark redactions as applied in database
             for redaction in redactions:
@@ -103,17 +111,19 @@ class RedactionProcessor:
             result['pagesModified'] = list(result['pagesModified'])
             
             # Save modified document
-            output_buffer = BytesIO()
-            doc.save(output_buffer, incremental=False, encryption=fitz.PDF_ENCRYPT_NONE)
-            doc.close()
+            pdf_out = None
+            if owns_doc:
+                pdf_out = doc.tobytes(encryption=fitz.PDF_ENCRYPT_NONE, **PDF_SAVE_OPTIONS)
+                doc.close()
             
             result['finalPageCount'] = original_page_count
             logger.info(f"Redaction processing completed: {result['totalRedactions']} redactions applied across {len(result['pagesModified'])} pages")
             
-            return output_buffer.getvalue(), result
+            return pdf_out, result
             
         except Exception as e:
-            doc.close()
+            if owns_doc:
+                doc.close()
             raise Exception(f"Redaction processing failed: {str(e)}")
     
     def _apply_single_redaction(self, page: fitz.Page, redaction: Dict[str, Any]) -> Dict[str, Any]:
@@ -234,7 +244,7 @@ class RedactionProcessor:
             # Insert rasterized image
             page.insert_image(page_rect, stream=img_data, keep_proportion=True)
             
-            logger.info(f"Successfully rasterized page {page_num}")
+            logger.debug("Successfully rasterized page %d", page_num)
             return True
             
         except Exception as e:
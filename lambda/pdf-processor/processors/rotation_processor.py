@@ -7,8 +7,9 @@ Maintains compatibility with existing Hydra ImageRotation database schema.
 
 import fitz
 import logging
-from typing import List, Dict, Any, Tuple
-from io import BytesIO
+from typing import List, Dict, Any, Optional, Tuple
+
+from processors import PDF_SAVE_OPTIONS
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +19,8 @@ class RotationProcessor:
     def __init__(self, db_manager):
         self.db_manager = db_manager
     
-    def process(self, image_id: int, pdf_bytes: bytes, rotations: List[Dict[str, Any]]) -> Tuple[bytes, Dict[str, Any]]:
+    def process(self, image_id: int, pdf_bytes: Optional[bytes], rotations: List[Dict[str, Any]],
+                doc: Optional[fitz.Document] = None) -> Tuple[Optional[bytes], Dict[str, Any]]:
         """
         Apply page rotations to PDF document
         
@@ -26,6 +28,9 @@ class RotationProcessor:
             image_id: Database image ID  
             pdf_bytes: PDF content to modify
             rotations: List of rotation specifications from ImageRotation table
+            doc: Already open document to modify in place instead of parsing
+                pdf_bytes. The caller keeps ownership: it is neither saved nor
+                closed here, and None is returned in place of the bytes.
             
         Returns:
             Tuple of (modified_pdf_bytes, processing_result)
@@ -36,7 +41,9 @@ class RotationProcessor:
         
         logger.info(f"Processing {len(rotations)} rotations for image {image_id}")
         
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        owns_doc = doc is None
+        if owns_doc:
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
         original_page_count = len(doc)
         
         result = {
@@ -78,7 +85,7 @@ class RotationProcessor:
                     })
                     result['rotationAngles'][str(page_index)] = rotate_angle
                     
-                    logger.info(f"Rotated page {page_index} by {rotate_angle} degrees")
+                    logger.debug("Rotated page %d by %d degrees", page_index, rotate_angle)
                 else:
                     # Rotation to 0 degrees (reset to original)
                     page.set_rotation(0)
@@ -89,7 +96,7 @@ class RotationProcessor:
                         'resetToOriginal': True
                     })
                     result['rotationAngles'][str(page_index)] = 0
-                    logger.info(f"Reset page {page_index} rotation to 0 degrees")
+                    logger.debug("Reset page %d rotation to 0 degrees", page_index)
             
             # Update database records to mark rotations as applied
             for rotation in valid_rotations:
@@ -101,17 +108,19 @@ class RotationProcessor:
                     logger.error(f"Failed to update rotation record {rotation.get('ID')}: {e}")
             
             # Save modified document
-            output_buffer = BytesIO()
-            doc.save(output_buffer, incremental=False)
-            doc.close()
+            pdf_out = None
+            if owns_doc:
+                pdf_out = doc.tobytes(**PDF_SAVE_OPTIONS)
+                doc.close()
             
             result['finalPageCount'] = original_page_count
             logger.info(f"Rotation processing completed: {len(result['pagesRotated'])} pages rotated")
             
-            return output_buffer.getvalue(), result
+            return pdf_out, result
             
         except Exception as e:
-            doc.close()
+            if owns_doc:
+                doc.close()
             raise Exception(f"Rotation processing failed: {str(e)}")
     
     def _validate_rotation(self, rotation: Dict[str, Any], page_count: int) -> bool:
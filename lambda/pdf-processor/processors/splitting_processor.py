@@ -8,8 +8,9 @@ Maintains compatibility with existing Hydra ImageBookmark database schema.
 import fitz
 import logging
 import uuid
-from typing import List, Dict, Any, Tuple
-from io import BytesIO
+from typing import List, Dict, Any, Optional, Tuple
+
+from processors import PDF_SAVE_OPTIONS
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +21,8 @@ class SplittingProcessor:
         self.db_manager = db_manager
         self.s3_manager = s3_manager
     
-    def process(self, image_record: Dict[str, Any], pdf_bytes: bytes, page_breaks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def process(self, image_record: Dict[str, Any], pdf_bytes: Optional[bytes], page_breaks: List[Dict[str, Any]],
+                doc: Optional[fitz.Document] = None) -> Dict[str, Any]:
         """
         Split PDF document based on page break locations
         
@@ -28,6 +30,8 @@ class SplittingProcessor:
             image_record: Original image database record
             pdf_bytes: PDF content to split
             page_breaks: List of page break records from ImageBookmark table
+            doc: Already open document to split instead of parsing pdf_bytes.
+                The caller keeps ownership and closes it.
             
         Returns:
             Processing result with new image IDs
@@ -38,7 +42,9 @@ class SplittingProcessor:
         
         logger.info(f"Processing {len(page_breaks)} page breaks for image {image_record['ID']}")
         
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        owns_doc = doc is None
+        if owns_doc:
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
         original_page_count = len(doc)
         
         result = {
@@ -61,7 +67,8 @@ class SplittingProcessor:
             if split_strategy == 'rename_only':
                 # Simple case: single break at beginning (just rename/reindex)
                 result = self._handle_rename_only(image_record, sorted_breaks[0], result)
-                doc.close()
+                if owns_doc:
+                    doc.close()
                 return result
             
             elif split_strategy == 'full_split':
@@ -69,15 +76,18 @@ class SplittingProcessor:
                 result = self._handle_full_split(
                     image_record, doc, pdf_bytes, sorted_breaks, result
                 )
-                doc.close()
+                if owns_doc:
+                    doc.close()
                 return result
             
             else:
-                doc.close()
+                if owns_doc:
+                    doc.close()
                 raise ValueError(f"Unknown split strategy: {split_strategy}")
                 
         except Exception as e:
-            doc.close()
+            if owns_doc:
+                doc.close()
             raise Exception(f"Document splitting failed: {str(e)}")
     
     def _determine_split_strategy(self, sorted_breaks: List[Dict[str, Any]], page_count: int) -> str:
@@ -226,10 +236,8 @@ class SplittingProcessor:
             split_doc.insert_pdf(doc, from_page=start_page, to_page=end_page - 1)
             
             # Convert to bytes
-            split_bytes = BytesIO()
-            split_doc.save(split_bytes, incremental=False)
+            split_content = split_doc.tobytes(**PDF_SAVE_OPTIONS)
             split_doc.close()
-            split_content = split_bytes.getvalue()
             
             # Create new image record in database
             new_image_id = self.db_manager.create_split_image(
@@ -11,14 +11,69 @@ Date: January 2025
 import boto3
 import logging
 import os
+import shutil
+import tempfile
+import threading
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from typing import Optional
+from typing import BinaryIO, Optional
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-# Initialize S3 client
-s3_client = boto3.client('s3')
+# S3 client, created on first use so cold starts that never touch S3 don't
+# pay for it. The default pool of 10 connections would throttle the
+# handler's parallel split uploads.
+_S3_CLIENT = None
+_S3_CLIENT_LOCK = threading.Lock()
+
+# Split PDFs above 8 MB are uploaded as multipart parts straight from the
+# file object instead of as one buffered PUT. Parts per upload are capped at
+# 4 since several splits upload at once and share the client's pool.
+SPLIT_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4,
+    use_threads=True
+)
+
+# Source PDFs are kept in /tmp across warm invocations so a retried document
+# isn't downloaded again. Entries are keyed by ETag and the least recently
+# used are evicted past PDF_CACHE_MAX_MB; 0 disables the cache.
+PDF_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'pdf_cache')
+PDF_CACHE_MAX_BYTES = int(os.environ.get('PDF_CACHE_MAX_MB', '256')) * 1024 * 1024
+
+# Free /tmp space kept for the current job on top of its source and the
+# split spools that spill to disk, which together take about the source's
+# size again. Cache entries are evicted until it is available.
+PDF_CACHE_HEADROOM_BYTES = int(os.environ.get('PDF_CACHE_HEADROOM_MB', '32')) * 1024 * 1024
+
+# Read size when streaming an object body to disk
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+def get_s3_client():
+    """
+    Get the shared S3 client, creating it on first use
+    
+    boto3 clients are thread-safe, so the one client serves the handler's
+    upload worker threads too.
+    
+    Returns:
+        S3.Client: Shared S3 client
+    """
+    global _S3_CLIENT
+    
+    if _S3_CLIENT is None:
+        with _S3_CLIENT_LOCK:
+            if _S3_CLIENT is None:
+                _S3_CLIENT = boto3.client('s3', config=Config(
+                    max_pool_connections=32,
+                    tcp_keepalive=True,
+                    retries={'mode': 'adaptive', 'total_max_attempts': 3}
+                ))
+    
+    return _S3_CLIENT
 
 def download_pdf_from_s3(document_id: int) -> bytes:
     """
@@ -39,7 +94,7 @@ def download_pdf_from_s3(document_id: int) -> bytes:
         
         logger.info(f"Downloading PDF {document_id} from s3://{bucket_name}/{s3_key}")
         
-        response = s3_client.get_object(
+        response = get_s3_client().get_object(
             Bucket=bucket_name,
             Key=s3_key
         )
@@ -59,6 +114,152 @@ def download_pdf_from_s3(document_id: int) -> bytes:
         logger.error(f"Unexpected error downloading PDF {document_id}: {e}")
         raise Exception(f"Failed to download PDF {document_id}: {e}")
 
+def download_pdf_to_tmp(document_id: int) -> str:
+    """
+    Download PDF from S3 into a local temporary file
+    
+    The object is streamed to /tmp rather than read into memory, so large
+    sources can be opened from disk by MuPDF. The caller owns the file and
+    must delete it; /tmp is capped at 512 MB per container. When the cache
+    is enabled the file is a hard link to the cached copy, so deleting it
+    leaves the cache intact.
+    
+    Args:
+        document_id: Document ID
+        
+    Returns:
+        str: Path of the downloaded file
+        
+    Raises:
+        Exception: If download fails
+    """
+    bucket_name = get_s3_bucket_name()
+    s3_key = f"IProcessing/Images/{document_id}.pdf"
+    
+    fd, local_path = tempfile.mkstemp(prefix=f"{document_id}_", suffix='.pdf')
+    os.close(fd)
+    
+    try:
+        logger.info(f"Downloading PDF {document_id} from s3://{bucket_name}/{s3_key} to {local_path}")
+        
+        if PDF_CACHE_MAX_BYTES > 0:
+            _fetch_cached_source(document_id, bucket_name, s3_key, local_path)
+        else:
+            get_s3_client().download_file(bucket_name, s3_key, local_path)
+        
+        logger.info(f"Successfully downloaded PDF {document_id}: {os.path.getsize(local_path)} bytes")
+        return local_path
+        
+    except ClientError as e:
+        os.remove(local_path)
+        error_code = e.response['Error']['Code']
+        if error_code in ('NoSuchKey', '404'):
+            logger.error(f"PDF {document_id} not found in S3: {s3_key}")
+        else:
+            logger.error(f"S3 download failed for PDF {document_id}: {e}")
+        raise Exception(f"Failed to download PDF {document_id}: {e}")
+    except Exception as e:
+        os.remove(local_path)
+        logger.error(f"Unexpected error downloading PDF {document_id}: {e}")
+        raise Exception(f"Failed to download PDF {document_id}: {e}")
+
+def _fetch_cached_source(document_id: int, bucket_name: str, s3_key: str, local_path: str) -> None:
+    """
+    Place the source PDF at local_path, downloading it only on a cache miss
+    
+    Args:
+        document_id: Document ID
+        bucket_name: Source bucket
+        s3_key: Source object key
+        local_path: Existing temp file to replace with the PDF
+    """
+    s3_client = get_s3_client()
+    head = s3_client.head_object(Bucket=bucket_name, Key=s3_key)
+    etag = head['ETag'].strip('"')
+    
+    # Sources too large to cache go straight to the caller's file. The cache
+    # is emptied first so the download and its splits have all of /tmp.
+    if head['ContentLength'] > PDF_CACHE_MAX_BYTES:
+        shutil.rmtree(PDF_CACHE_DIR, ignore_errors=True)
+        _download_version(bucket_name, s3_key, head['ETag'], local_path)
+        return
+    
+    cached_path = os.path.join(PDF_CACHE_DIR, f"{document_id}_{etag}.pdf")
+    
+    if os.path.exists(cached_path):
+        logger.info(f"Using cached copy of PDF {document_id} (ETag {etag})")
+        os.utime(cached_path)
+    else:
+        os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+        _evict_cached_sources(document_id, head['ContentLength'])
+        
+        # Downloaded under a temporary name so a failed transfer never
+        # leaves a truncated cache entry behind
+        partial_path = f"{cached_path}.part"
+        try:
+            _download_version(bucket_name, s3_key, head['ETag'], partial_path)
+            os.replace(partial_path, cached_path)
+        except Exception:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+    
+    os.remove(local_path)
+    os.link(cached_path, local_path)
+
+def _download_version(bucket_name: str, s3_key: str, etag: str, local_path: str) -> None:
+    """
+    Stream the object to local_path, failing if it no longer has the given ETag
+    
+    Uses get_object rather than download_file because the transfer manager
+    does not accept IfMatch, and the cache entry must hold the version its
+    ETag names.
+    
+    Args:
+        bucket_name: Source bucket
+        s3_key: Source object key
+        etag: ETag from the HEAD request, quotes included
+        local_path: File to write
+        
+    Raises:
+        ClientError: PreconditionFailed if the object changed since the HEAD
+    """
+    response = get_s3_client().get_object(Bucket=bucket_name, Key=s3_key, IfMatch=etag)
+    with open(local_path, 'wb') as local_file:
+        shutil.copyfileobj(response['Body'], local_file, DOWNLOAD_CHUNK_SIZE)
+
+def _evict_cached_sources(document_id: int, incoming_bytes: int) -> None:
+    """
+    Make room in the source cache and /tmp for a new entry
+    
+    Older versions of the same document are always removed. Other entries
+    are removed least recently used first until the cache fits within
+    PDF_CACHE_MAX_BYTES and /tmp has room for the new entry, the job's split
+    spools and PDF_CACHE_HEADROOM_BYTES.
+    
+    Args:
+        document_id: Document about to be cached
+        incoming_bytes: Size of the new entry
+    """
+    entries = []
+    for name in os.listdir(PDF_CACHE_DIR):
+        path = os.path.join(PDF_CACHE_DIR, name)
+        if name.startswith(f"{document_id}_"):
+            os.remove(path)
+            continue
+        stat = os.stat(path)
+        entries.append((stat.st_mtime, stat.st_size, path))
+    
+    total_bytes = incoming_bytes + sum(size for _, size, _ in entries)
+    free_bytes = shutil.disk_usage(PDF_CACHE_DIR).free
+    needed_bytes = 2 * incoming_bytes + PDF_CACHE_HEADROOM_BYTES
+    for _, size, path in sorted(entries):
+        if total_bytes <= PDF_CACHE_MAX_BYTES and free_bytes >= needed_bytes:
+            break
+        os.remove(path)
+        total_bytes -= size
+        free_bytes += size
+
 def get_s3_bucket_name() -> str:
     """
     Get S3 bucket name from environment variables
@@ -92,12 +293,15 @@ def get_s3_key_for_document(document_id: int, is_split: bool = False,
     else:
         return f"IProcessing/Images/{document_id}.pdf"
 
-def upload_split_to_s3(pdf_data: bytes, filename: str) -> str:
+def upload_split_to_s3(pdf_file: BinaryIO, filename: str) -> str:
     """
     Upload split PDF to S3 using simplified structure
     
+    The file is streamed from its current position, so the split never has
+    to be materialized as a single bytes object.
+    
     Args:
-        pdf_data: PDF file bytes
+        pdf_file: Readable binary file object positioned at the start of the PDF
         filename: Generated filename for the split
         
     Returns:
@@ -113,19 +317,22 @@ def upload_split_to_s3(pdf_data: bytes, filename: str) -> str:
         logger.info(f"Uploading split PDF to s3://{bucket_name}/{s3_key}")
         
         # Upload with proper content type and metadata
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key=s3_key,
-            Body=pdf_data,
-            ContentType='application/pdf',
-            Metadata={
-                'source': 'esizzle-pdf-processor',
-                'processing_date': str(datetime.utcnow()),
-                'file_type': 'split_document'
-            }
+        get_s3_client().upload_fileobj(
+            pdf_file,
+            bucket_name,
+            s3_key,
+            ExtraArgs={
+                'ContentType': 'application/pdf',
+                'Metadata': {
+                    'source': 'esizzle-pdf-processor',
+                    'processing_date': str(datetime.utcnow()),
+                    'file_type': 'split_document'
+                }
+            },
+            Config=SPLIT_TRANSFER_CONFIG
         )
         
-        logger.info(f"Successfully uploaded split PDF: {len(pdf_data)} bytes to {s3_key}")
+        logger.info(f"Successfully uploaded split PDF: {pdf_file.tell()} bytes to {s3_key}")
         return s3_key
         
     except ClientError as e:
@@ -148,7 +355,7 @@ def verify_s3_access() -> bool:
         test_key = "IProcessing/Images/"
         
         # List objects to verify access
-        response = s3_client.list_objects_v2(
+        response = get_s3_client().list_objects_v2(
             Bucket=bucket_name,
             Prefix=test_key,
             MaxKeys=1
@@ -195,7 +402,7 @@ def get_document_metadata_from_s3(s3_key: str) -> dict:
     try:
         bucket_name = get_s3_bucket_name()
         
-        response = s3_client.head_object(Bucket=bucket_name, Key=s3_key)
+        response = get_s3_client().head_object(Bucket=bucket_name, Key=s3_key)
         
         return {
             'size': response.get('ContentLength', 0),
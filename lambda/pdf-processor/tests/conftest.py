@@ -0,0 +1,7 @@
+"""Shared pytest setup for the PDF processor Lambda"""
+
+import os
+import sys
+
+# The handler modules are imported top-level, as the Lambda runtime does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,130 @@
+"""
+Tests for s3_operations source downloads, run against moto's S3 mock
+"""
+
+import os
+import tempfile
+from collections import namedtuple
+
+import boto3
+import pytest
+from moto import mock_s3
+
+import s3_operations
+
+BUCKET = 'esizzle-test-bucket'
+DOCUMENT_ID = 4242
+SOURCE_KEY = f"IProcessing/Images/{DOCUMENT_ID}.pdf"
+
+DiskUsage = namedtuple('DiskUsage', 'total used free')
+
+@pytest.fixture
+def s3(monkeypatch, tmp_path):
+    """Mocked bucket with the module's client and cache pointed at it"""
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    monkeypatch.setenv('S3_BUCKET_NAME', BUCKET)
+    monkeypatch.setattr(s3_operations, 'PDF_CACHE_DIR', str(tmp_path / 'pdf_cache'))
+    
+    with mock_s3():
+        monkeypatch.setattr(s3_operations, '_S3_CLIENT', None)
+        client = boto3.client('s3')
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+    
+    monkeypatch.setattr(s3_operations, '_S3_CLIENT', None)
+
+def _source_key(document_id: int) -> str:
+    return f"IProcessing/Images/{document_id}.pdf"
+
+def _cached_documents() -> set:
+    return {int(name.split('_')[0]) for name in os.listdir(s3_operations.PDF_CACHE_DIR)}
+
+def _set_last_used(document_id: int, timestamp: int) -> None:
+    for name in os.listdir(s3_operations.PDF_CACHE_DIR):
+        if name.startswith(f"{document_id}_"):
+            os.utime(os.path.join(s3_operations.PDF_CACHE_DIR, name), (timestamp, timestamp))
+
+def _download(document_id: int = DOCUMENT_ID) -> bytes:
+    path = s3_operations.download_pdf_to_tmp(document_id)
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+def test_download_populates_and_reuses_cache(s3):
+    s3.put_object(Bucket=BUCKET, Key=SOURCE_KEY, Body=b'%PDF-1.4 first')
+    
+    assert _download() == b'%PDF-1.4 first'
+    cached = os.listdir(s3_operations.PDF_CACHE_DIR)
+    assert len(cached) == 1
+    
+    # A second download is served from the same cache entry
+    assert _download() == b'%PDF-1.4 first'
+    assert os.listdir(s3_operations.PDF_CACHE_DIR) == cached
+
+def test_download_replaces_stale_cache_entry(s3):
+    s3.put_object(Bucket=BUCKET, Key=SOURCE_KEY, Body=b'%PDF-1.4 first')
+    _download()
+    
+    s3.put_object(Bucket=BUCKET, Key=SOURCE_KEY, Body=b'%PDF-1.4 second')
+    
+    assert _download() == b'%PDF-1.4 second'
+    assert len(os.listdir(s3_operations.PDF_CACHE_DIR)) == 1
+
+def test_download_evicts_least_recently_used_documents(s3, monkeypatch):
+    # Room for two 10 byte sources but not three
+    monkeypatch.setattr(s3_operations, 'PDF_CACHE_MAX_BYTES', 25)
+    for document_id in (1, 2, 3):
+        s3.put_object(Bucket=BUCKET, Key=_source_key(document_id), Body=f'%PDF-1.4 {document_id}'.encode())
+    
+    _download(1)
+    _download(2)
+    _set_last_used(1, 2000)
+    _set_last_used(2, 1000)
+    
+    assert _download(3) == b'%PDF-1.4 3'
+    assert _cached_documents() == {1, 3}
+
+def test_download_evicts_for_free_disk_space(s3, monkeypatch):
+    # Well within the size cap, but /tmp reports too little free space for
+    # the incoming source, its splits and the headroom
+    monkeypatch.setattr(s3_operations, 'PDF_CACHE_HEADROOM_BYTES', 100)
+    monkeypatch.setattr(s3_operations.shutil, 'disk_usage',
+                        lambda path: DiskUsage(total=1000, used=900, free=110))
+    for document_id in (1, 2):
+        s3.put_object(Bucket=BUCKET, Key=_source_key(document_id), Body=f'%PDF-1.4 {document_id}'.encode())
+    
+    _download(1)
+    assert _download(2) == b'%PDF-1.4 2'
+    assert _cached_documents() == {2}
+
+def test_download_bypasses_cache_for_large_sources(s3, monkeypatch):
+    s3.put_object(Bucket=BUCKET, Key=_source_key(1), Body=b'%PDF-1.4 1')
+    _download(1)
+    
+    # Cached entries are cleared so the bypassed source has /tmp to itself
+    monkeypatch.setattr(s3_operations, 'PDF_CACHE_MAX_BYTES', 4)
+    s3.put_object(Bucket=BUCKET, Key=SOURCE_KEY, Body=b'%PDF-1.4 large')
+    
+    assert _download() == b'%PDF-1.4 large'
+    assert not os.path.exists(s3_operations.PDF_CACHE_DIR)
+
+def test_download_with_cache_disabled(s3, monkeypatch):
+    monkeypatch.setattr(s3_operations, 'PDF_CACHE_MAX_BYTES', 0)
+    s3.put_object(Bucket=BUCKET, Key=SOURCE_KEY, Body=b'%PDF-1.4 uncached')
+    
+    assert _download() == b'%PDF-1.4 uncached'
+    assert not os.path.exists(s3_operations.PDF_CACHE_DIR)
+
+def test_download_missing_source_cleans_up(s3):
+    def temp_files():
+        return {name for name in os.listdir(tempfile.gettempdir())
+                if name.startswith(f"{DOCUMENT_ID}_")}
+    
+    before = temp_files()
+    with pytest.raises(Exception, match=f"Failed to download PDF {DOCUMENT_ID}"):
+        s3_operations.download_pdf_to_tmp(DOCUMENT_ID)
+    assert temp_files() == before
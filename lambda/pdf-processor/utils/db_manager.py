@@ -31,7 +31,12 @@ class DatabaseManager:
         }
         
     def _get_db_password(self) -> str:
-        """Get database password from environment or AWS Secrets Manager"""
+        """
+        Get database password from environment or AWS Secrets Manager
+        
+        Raises if a secret name is configured but the lookup fails, so a
+        manager with an empty password is never built and cached.
+        """
         
         # First try direct environment variable
         password = os.environ.get('DB_PASSWORD')
@@ -57,7 +62,7 @@ class DatabaseManager:
                 
             except Exception as e:
                 logger.error(f"Failed to get password from Secrets Manager: {e}")
-                return ''
+                raise
         
         return ''
     
@@ -108,6 +113,40 @@ class DatabaseManager:
             logger.error(f"Failed to get image record {image_id}: {e}")
             return None
     
+    def get_manipulation_counts(self, image_id: int) -> Optional[Dict[str, int]]:
+        """
+        Count each kind of pending manipulation for an image in one query
+        
+        Uses the same filters as the get_* methods for each kind, so a zero
+        count means the matching list would be empty.
+        
+        Returns:
+            Dict keyed 'redactions', 'rotations', 'deletions' and 'pageBreaks',
+            or None if the query failed
+        """
+        try:
+            with self.get_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT 'redactions' AS Kind, COUNT(*) AS Count
+                        FROM ImageRedaction
+                        WHERE ImageID = %s
+                          AND Deleted = 0
+                          AND (Applied IS NULL OR Applied = 0)
+                        UNION ALL
+                        SELECT 'rotations', COUNT(*) FROM ImageRotation WHERE ImageID = %s
+                        UNION ALL
+                        SELECT 'deletions', COUNT(*) FROM ImagePageDeletion WHERE ImageID = %s
+                        UNION ALL
+                        SELECT 'pageBreaks', COUNT(*) FROM ImageBookmark WHERE ImageID = %s AND Deleted = 0
+                    """, (image_id, image_id, image_id, image_id))
+                    
+                    return {row['Kind']: row['Count'] for row in cursor.fetchall()}
+                    
+        except Exception as e:
+            logger.error(f"Failed to count manipulations for image {image_id}: {e}")
+            return None
+    
     def get_pending_redactions(self, image_id: int) -> List[Dict[str, Any]]:
         """Get pending redactions for an image"""
         try:
@@ -307,6 +346,48 @@ class DatabaseManager:
             logger.error(f"Failed to mark page deletion {deletion_id} as processed: {e}")
             return False
     
+    def complete_page_deletions(self, image_id: int, page_count: Optional[int],
+                                deletion_ids: List[int]) -> bool:
+        """
+        Record applied page deletions in a single transaction
+        
+        Args:
+            image_id: Database image ID
+            page_count: New page count, or None if it did not change
+            deletion_ids: ImagePageDeletion IDs to mark as processed
+            
+        Returns:
+            True if the updates were committed, False otherwise
+        """
+        try:
+            with self.get_connection() as connection:
+                with connection.cursor() as cursor:
+                    now = datetime.utcnow()
+                    
+                    if page_count is not None:
+                        cursor.execute("""
+                            UPDATE Image 
+                            SET PageCount = %s, DateUpdated = %s 
+                            WHERE ID = %s
+                        """, (page_count, now, image_id))
+                    
+                    # One statement for every processed deletion
+                    if deletion_ids:
+                        placeholders = ', '.join(['%s'] * len(deletion_ids))
+                        cursor.execute(f"""
+                            UPDATE ImagePageDeletion 
+                            SET DateProcessed = %s 
+                            WHERE ID IN ({placeholders})
+                        """, (now, *deletion_ids))
+                    
+                    connection.commit()
+                    logger.info(f"Recorded {len(deletion_ids)} processed page deletions for image {image_id}")
+                    return True
+                    
+        except Exception as e:
+            logger.error(f"Failed to record page deletions for image {image_id}: {e}")
+            return False
+    
     def update_image_document_type(self, image_id: int, doc_type_id: int, 
                                  document_date: Optional[datetime] = None, 
                                  comments: Optional[str] = None) -> bool:
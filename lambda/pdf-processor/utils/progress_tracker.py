@@ -15,6 +15,30 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Callback session shared by every tracker and kept open across warm
+# invocations, so updates reuse a pooled keep-alive connection instead of a
+# new DNS lookup and TLS handshake each. aiohttp sessions are bound to the
+# event loop they were created on.
+_HTTP_SESSION: Optional[aiohttp.ClientSession] = None
+_HTTP_SESSION_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+def _get_http_session() -> aiohttp.ClientSession:
+    """Return the shared callback session for the running event loop"""
+    global _HTTP_SESSION, _HTTP_SESSION_LOOP
+    
+    loop = asyncio.get_running_loop()
+    if _HTTP_SESSION is None or _HTTP_SESSION.closed or _HTTP_SESSION_LOOP is not loop:
+        _HTTP_SESSION = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=5.0),  # 5 second timeout
+            headers={
+                'Content-Type': 'application/json',
+                'User-Agent': 'ESizzle-Lambda-Processor/1.0'
+            }
+        )
+        _HTTP_SESSION_LOOP = loop
+    
+    return _HTTP_SESSION
+
 class ProgressTracker:
     """Manages progress tracking and callback updates during processing"""
     
@@ -64,25 +88,14 @@ class ProgressTracker:
             # Use the callback URL with session ID
             full_url = f"{self.callback_url}/{self.session_id}"
             
-            # Create async HTTP session
-            timeout = aiohttp.ClientTimeout(total=5.0)  # 5 second timeout
-            
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(
-                    full_url,
-                    json=payload,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'User-Agent': 'ESizzle-Lambda-Processor/1.0'
-                    }
-                ) as response:
-                    
-                    if response.status == 200:
-                        logger.debug(f"Progress update sent: {status} {progress}% - {message}")
-                        return True
-                    else:
-                        logger.warning(f"Progress update failed with status {response.status}")
-                        return False
+            async with _get_http_session().post(full_url, json=payload) as response:
+                
+                if response.status == 200:
+                    logger.debug(f"Progress update sent: {status} {progress}% - {message}")
+                    return True
+                else:
+                    logger.warning(f"Progress update failed with status {response.status}")
+                    return False
                         
         except asyncio.TimeoutError:
             logger.warning("Progress update timed out")
@@ -292,19 +305,9 @@ class BatchProgressTracker:
             # Use the callback URL with session ID
             full_url = f"{self.callback_url}/{self.session_id}"
             
-            timeout = aiohttp.ClientTimeout(total=5.0)
-            
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(
-                    full_url,
-                    json=payload,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'User-Agent': 'ESizzle-Lambda-Processor/1.0'
-                    }
-                ) as response:
-                    
-                    return response.status == 200
+            async with _get_http_session().post(full_url, json=payload) as response:
+                
+                return response.status == 200
                     
         except Exception as e:
             logger.warning(f"Failed to send batch progress update: {e}")
@@ -9,6 +9,7 @@ import logging
 import os
 from typing import Dict, Any, Optional, List
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
 from io import BytesIO
 
@@ -22,7 +23,9 @@ class S3Manager:
         self.region = os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
         
         try:
-            self.s3_client = boto3.client('s3', region_name=self.region)
+            # TCP keepalive holds pooled connections open between warm
+            # invocations, since main.py reuses this manager
+            self.s3_client = boto3.client('s3', region_name=self.region, config=Config(tcp_keepalive=True))
         except (ClientError, NoCredentialsError) as e:
             logger.error(f"Failed to initialize S3 client: {e}")
             raise